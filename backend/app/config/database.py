@@ -8,6 +8,9 @@ load_dotenv()
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "fms_db")
 
+# How long tombstones of deleted documents are kept for change feed clients
+TOMBSTONE_RETENTION_DAYS = int(os.getenv("TOMBSTONE_RETENTION_DAYS", 30))
+
 # MongoDB client
 client = AsyncIOMotorClient(MONGODB_URL)
 db = client[DATABASE_NAME]
@@ -16,6 +19,69 @@ db = client[DATABASE_NAME]
 users_collection = db.users
 tasks_collection = db.tasks
 analytics_collection = db.analytics
+daily_task_stats_collection = db.daily_task_stats
+user_task_stats_collection = db.user_task_stats
+tombstones_collection = db.tombstones
+
+# Index registry: the indexes of each collection as (keys, options), matching
+# the filters and sorts the routers use. tests/test_query_plans.py verifies that
+# every router query is served by one of them.
+INDEXES = {
+    "users": [
+        ([("email", 1)], {"unique": True}),
+        ([("is_active", 1)], {}),
+        ([("updated_at", 1)], {}),
+    ],
+    "tasks": [
+        # Per-user task lists, filtered by status and ordered by due date
+        ([("assigned_to", 1), ("status", 1), ("due_date", 1)], {}),
+        # Open tasks past their due date, for the status sweeper
+        ([("status", 1), ("due_date", 1)], {}),
+        # Per-user work queues, in stored queue order (task_ranking.QUEUE_SORT)
+        ([("assigned_to", 1), ("sort_rank", 1), ("due_date", 1), ("_id", 1)], {}),
+        # Task list pages, ordered by (due_date, _id) with an optional filter
+        ([("due_date", 1), ("_id", 1)], {}),
+        ([("assigned_to", 1), ("due_date", 1), ("_id", 1)], {}),
+        ([("priority", 1), ("due_date", 1), ("_id", 1)], {}),
+        # One index per branch of the analytics date range $or (due_date above)
+        ([("created_at", 1)], {}),
+        ([("completed_at", 1)], {}),
+        # Change feed
+        ([("updated_at", 1)], {}),
+    ],
+    "daily_task_stats": [
+        ([("day", 1), ("user", 1), ("priority", 1), ("status", 1)], {"unique": True}),
+    ],
+    "user_task_stats": [
+        ([("user", 1), ("status", 1)], {"unique": True}),
+    ],
+    "activities": [
+        # Recent activity feed, newest first
+        ([("timestamp", -1)], {}),
+    ],
+    "tombstones": [
+        ([("collection", 1), ("deleted_at", 1)], {}),
+        # Tombstones of deleted documents expire once no change feed client needs them
+        ([("deleted_at", 1)], {"expireAfterSeconds": TOMBSTONE_RETENTION_DAYS * 24 * 3600}),
+    ],
+}
+
+# Indexes created by earlier versions that no query uses any more
+OBSOLETE_INDEXES = {
+    "tasks": ["user_id_1", "due_date_1", "priority_1_due_date_1"],
+}
+
+async def create_indexes():
+    """Create the indexes of the registry and drop the obsolete ones"""
+    for collection_name, indexes in INDEXES.items():
+        for keys, options in indexes:
+            await db[collection_name].create_index(keys, **options)
+    
+    for collection_name, index_names in OBSOLETE_INDEXES.items():
+        existing = await db[collection_name].index_information()
+        for index_name in index_names:
+            if index_name in existing:
+                await db[collection_name].drop_index(index_name)
 
 async def init_db():
     """Initialize database connections and create indexes"""
@@ -25,9 +91,7 @@ async def init_db():
         print("Successfully connected to MongoDB")
         
         # Create indexes for faster queries
-        await users_collection.create_index("email", unique=True)
-        await tasks_collection.create_index("user_id")
-        await tasks_collection.create_index("due_date")
+        await create_indexes()
         
         print("Database initialized successfully")
     except Exception as e:
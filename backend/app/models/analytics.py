@@ -53,8 +53,15 @@ class UserTaskHeatmap(BaseModel):
     user_name: str
     missed_tasks_by_day: Dict[str, int]  # Format: "YYYY-MM-DD": count
 
+class UserTaskHeatmapMatrix(BaseModel):
+    user_ids: List[str]
+    user_names: List[str]
+    days: List[str]  # Format: "YYYY-MM-DD"
+    missed_tasks: List[List[int]]  # One row per user, one column per day
+
 class AnalyticsDashboard(BaseModel):
     task_completion_trend: List[TaskCompletion]
     user_performances: List[UserPerformance]
     team_performance: TeamPerformance
-    user_heatmaps: List[UserTaskHeatmap] 
\ No newline at end of file
+    user_heatmaps: List[UserTaskHeatmap]
+    user_heatmap_matrix: Optional[UserTaskHeatmapMatrix] = None 
\ No newline at end of file
@@ -81,4 +81,44 @@ class TaskUpdate(BaseModel):
     priority: Optional[TaskPriority] = None
     assigned_to: Optional[str] = None
     tags: Optional[List[str]] = None
-    status: Optional[TaskStatus] = None 
\ No newline at end of file
+    status: Optional[TaskStatus] = None
+
+class TaskBatchUpdate(TaskUpdate):
+    id: str
+
+class TaskBatch(BaseModel):
+    create: List[TaskCreate] = []
+    update: List[TaskBatchUpdate] = []
+    delete: List[str] = []  # Task IDs
+
+class TaskBatchItemResult(BaseModel):
+    operation: str  # create, update or delete
+    index: int  # Position in the operation's list
+    id: Optional[str] = None
+    status: str  # ok, invalid_id, not_found, forbidden, conflict or error
+    error: Optional[str] = None
+    task: Optional[Task] = None
+
+class TaskBatchResult(BaseModel):
+    created: int
+    updated: int
+    deleted: int
+    failed: int
+    results: List[TaskBatchItemResult]
+
+class TaskAssignment(BaseModel):
+    task_id: str
+    user_id: str
+
+class OptimizationJob(BaseModel):
+    job_id: str
+    algorithm: str
+    status: str
+    task_count: int
+    generation: int = 0
+    generations: Optional[int] = None
+    best_fitness: Optional[float] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    allocation: Optional[List[TaskAssignment]] = None
+    error: Optional[str] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, Annotated
+from typing import List, Optional, Annotated
 from datetime import datetime
 from bson import ObjectId
 from pydantic_core import core_schema
@@ -30,6 +30,7 @@ class UserBase(BaseModel):
     email: EmailStr
     full_name: str
     company: Optional[str] = None
+    skills: List[str] = []
 
 class UserCreate(UserBase):
     password: str = Field(..., min_length=8, description="Password must be at least 8 characters long")
@@ -69,6 +70,7 @@ class User(UserBase):
 class UserUpdate(BaseModel):
     full_name: Optional[str] = None
     company: Optional[str] = None
+    skills: Optional[List[str]] = None
     password: Optional[str] = None
 
 class Token(BaseModel):
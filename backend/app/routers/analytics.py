@@ -1,42 +1,122 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from typing import List, Dict
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import List, Dict, Optional
 from datetime import datetime, timedelta, date
-from ..models.analytics import TaskCompletion, UserPerformance, TeamPerformance, UserTaskHeatmap, AnalyticsDashboard
+from ..models.analytics import TaskCompletion, UserPerformance, TeamPerformance, UserTaskHeatmap, UserTaskHeatmapMatrix, AnalyticsDashboard
 from ..utils.auth import get_current_user
 from ..config.database import tasks_collection, users_collection
-import pandas as pd
-import numpy as np
+from ..utils.daily_stats import daily_totals, day_range, user_totals
+from ..utils.performance_metrics import COMPLETED_STATUSES, OVERDUE_STATUSES, USER_METRICS_GROUP, finalize_user_metrics, user_metric_records
+from ..utils.status_sweeper import status_sweeper
+from ..utils.response_cache import analytics_cache
+from ..utils.heatmaps import day_labels, heatmap_matrix, heatmap_rows
+from ..utils.powerbi_integration import (
+    build_export_tables, parquet_archive, powerbi_task_row, stream_powerbi_rows, write_parquet_export
+)
+from ..utils.change_feed import (
+    changed_since_query, deleted_since, needs_full_reload, next_watermark, normalize_watermark
+)
 from bson import ObjectId
+import functools
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
+# Analytics cover the whole team's tasks, so every user shares the cached responses
+TEAM_SCOPE = "team"
+
+def cached_response(endpoint: str):
+    """
+    Serve an analytics endpoint from the shared response cache.
+    
+    Responses are keyed by (endpoint, query parameters, scope); the cache
+    is cleared whenever tasks are written.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            params = tuple(sorted((name, value) for name, value in kwargs.items() if name != "current_user"))
+            key = (endpoint, params, TEAM_SCOPE)
+            return await analytics_cache.get_or_compute(key, lambda: func(*args, **kwargs))
+        return wrapper
+    return decorator
+
+def _day(field: str) -> Dict:
+    """Aggregation expression truncating a date field to its (UTC) day"""
+    return {"$dateTrunc": {"date": f"${field}", "unit": "day"}}
+
+def _in_date_range(start_date: datetime) -> Dict:
+    """Query for tasks created, due or completed since start_date"""
+    return {
+        "$or": [
+            {"created_at": {"$gte": start_date}},
+            {"due_date": {"$gte": start_date}},
+            {"completed_at": {"$gte": start_date}}
+        ]
+    }
+
+def _dashboard_pipeline(start_date: datetime) -> List[Dict]:
+    """
+    Single aggregation computing the dashboard statistics that aren't
+    kept in the daily rollup.
+    
+    Each $facet returns one row per bucket (day, user, priority, ...) so
+    only aggregated rows are sent back, however many tasks are in range.
+    """
+    return [
+        {"$match": _in_date_range(start_date)},
+        {"$facet": {
+            # User performance
+            "user_stats": [
+                {"$group": USER_METRICS_GROUP}
+            ],
+            # Team performance
+            "by_priority": [
+                {"$group": {"_id": {"$ifNull": ["$priority", "medium"]}, "count": {"$sum": 1}}}
+            ],
+            "by_status": [
+                {"$group": {"_id": {"$ifNull": ["$status", "todo"]}, "count": {"$sum": 1}}}
+            ],
+            # User heatmaps
+            "missed_by_user_day": [
+                {"$match": {"status": {"$in": OVERDUE_STATUSES}, "due_date": {"$ne": None}}},
+                {"$group": {"_id": {"user": "$assigned_to", "day": _day("due_date")}, "count": {"$sum": 1}}}
+            ]
+        }}
+    ]
+
 @router.get("/dashboard", response_model=AnalyticsDashboard)
-async def get_analytics_dashboard(days: int = 30, current_user = Depends(get_current_user)):
+@cached_response("dashboard")
+async def get_analytics_dashboard(
+    days: int = 30,
+    heatmap_format: str = Query("dict", pattern="^(dict|matrix)$"),
+    current_user = Depends(get_current_user)
+):
     """
     Generate analytics dashboard data for PowerBI integration.
+    
+    With heatmap_format=matrix the user heatmaps are returned as one dense
+    users x days matrix (user_heatmap_matrix) instead of a dict per user.
     """
     # Calculate date range
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days)
     
-    # Get tasks within date range
-    tasks = await tasks_collection.find({
-        "$or": [
-            {"created_at": {"$gte": start_date}},
-            {"due_date": {"$gte": start_date}},
-            {"completed_at": {"$gte": start_date}}
-        ]
-    }).to_list(length=1000)
+    # Aggregate the tasks within date range
+    results = await tasks_collection.aggregate(_dashboard_pipeline(start_date)).to_list(length=1)
+    facets = results[0] if results else {}
     
     # Get users
     users = await users_collection.find().to_list(length=100)
     user_map = {str(user["_id"]): user for user in users}
     
-    # Convert to pandas DataFrame for easier analysis
-    tasks_df = pd.DataFrame(tasks)
+    # Count tasks by priority and status
+    tasks_by_priority = {row["_id"]: row["count"] for row in facets.get("by_priority", [])}
+    tasks_by_status = {row["_id"]: row["count"] for row in facets.get("by_status", [])}
+    total_tasks = sum(tasks_by_status.values())
     
     # If no tasks, return empty dashboard
-    if tasks_df.empty:
+    if total_tasks == 0:
         return AnalyticsDashboard(
             task_completion_trend=[],
             user_performances=[],
@@ -51,96 +131,27 @@ async def get_analytics_dashboard(days: int = 30, current_user = Depends(get_cur
             user_heatmaps=[]
         )
     
-    # 1. Generate task completion trend
-    completion_trend = []
+    # 1. Generate task completion trend from the daily rollup
+    totals = await daily_totals(start_date, end_date)
+    trend_days = day_range(start_date, days)
     
-    for i in range(days):
-        day = start_date + timedelta(days=i)
-        day_end = day + timedelta(days=1)
-        day_date = day.date()
-        
-        # Count completed tasks for this day
-        completed = sum(1 for task in tasks if 
-                         task.get("completed_at") and 
-                         day <= task["completed_at"] < day_end)
-        
-        # Count total tasks due this day
-        total = sum(1 for task in tasks if 
-                    task.get("due_date") and 
-                    day.date() == task["due_date"].date())
-        
-        completion_trend.append(TaskCompletion(
-            date=day_date,
-            completed=completed,
-            total=total
-        ))
+    completion_trend = [
+        TaskCompletion(
+            date=day.date(),
+            completed=totals.get(day, {}).get("completed", 0),
+            total=totals.get(day, {}).get("due", 0)
+        )
+        for day in trend_days
+    ]
     
     # 2. Generate user performance metrics
-    user_performances = []
-    
-    for user_id, user in user_map.items():
-        # Filter tasks for this user
-        user_tasks = [task for task in tasks if task.get("assigned_to") == user_id]
-        
-        if not user_tasks:
-            continue
-        
-        # Count metrics
-        tasks_completed = sum(1 for task in user_tasks if task.get("status") == "complete")
-        tasks_overdue = sum(1 for task in user_tasks if task.get("status") == "overdue")
-        tasks_total = len(user_tasks)
-        
-        # Calculate on-time percentage
-        on_time_percentage = 0
-        if tasks_completed > 0:
-            on_time_tasks = sum(1 for task in user_tasks 
-                               if task.get("status") == "complete" and 
-                               task.get("completed_at") and 
-                               task.get("due_date") and 
-                               task["completed_at"] <= task["due_date"])
-            on_time_percentage = (on_time_tasks / tasks_completed) * 100
-        
-        # Calculate average completion time in hours
-        completion_times = []
-        for task in user_tasks:
-            if task.get("status") == "complete" and task.get("completed_at") and task.get("created_at"):
-                time_diff = task["completed_at"] - task["created_at"]
-                completion_times.append(time_diff.total_seconds() / 3600)  # Convert to hours
-        
-        avg_completion_time = None
-        if completion_times:
-            avg_completion_time = sum(completion_times) / len(completion_times)
-        
-        user_performances.append(UserPerformance(
-            user_id=user_id,
-            user_name=user.get("full_name", "Unknown"),
-            tasks_completed=tasks_completed,
-            tasks_overdue=tasks_overdue,
-            tasks_total=tasks_total,
-            on_time_percentage=on_time_percentage,
-            average_completion_time=avg_completion_time
-        ))
+    user_stats = finalize_user_metrics(facets["user_stats"])
+    user_performances = [UserPerformance(**record) for record in user_metric_records(user_stats, users)]
     
     # 3. Generate team performance metrics
-    total_tasks = len(tasks)
-    completed_tasks = sum(1 for task in tasks if task.get("status") == "complete")
-    overdue_tasks = sum(1 for task in tasks if task.get("status") == "overdue")
-    
-    completion_rate = 0
-    if total_tasks > 0:
-        completion_rate = (completed_tasks / total_tasks) * 100
-    
-    # Count tasks by priority
-    tasks_by_priority = {}
-    for task in tasks:
-        priority = task.get("priority", "medium")
-        tasks_by_priority[priority] = tasks_by_priority.get(priority, 0) + 1
-    
-    # Count tasks by status
-    tasks_by_status = {}
-    for task in tasks:
-        status = task.get("status", "todo")
-        tasks_by_status[status] = tasks_by_status.get(status, 0) + 1
+    completed_tasks = sum(tasks_by_status.get(status, 0) for status in COMPLETED_STATUSES)
+    overdue_tasks = sum(tasks_by_status.get(status, 0) for status in OVERDUE_STATUSES)
+    completion_rate = (completed_tasks / total_tasks) * 100
     
     team_performance = TeamPerformance(
         total_tasks=total_tasks,
@@ -151,47 +162,45 @@ async def get_analytics_dashboard(days: int = 30, current_user = Depends(get_cur
         tasks_by_status=tasks_by_status
     )
     
-    # 4. Generate user task heatmaps (missed tasks by day)
-    user_heatmaps = []
+    # 4. Generate user task heatmaps (missed tasks by day) as a users x days matrix
+    heatmap_users = [user_id for user_id in user_map if user_id in user_stats]
+    days_axis = day_labels(trend_days)
+    missed = facets["missed_by_user_day"]
+    missed_tasks = heatmap_matrix(
+        heatmap_users,
+        days_axis,
+        rows=[row["_id"].get("user") for row in missed],
+        columns=day_labels(row["_id"]["day"] for row in missed),
+        counts=[row["count"] for row in missed]
+    )
+    user_names = [user_map[user_id].get("full_name", "Unknown") for user_id in heatmap_users]
     
-    for user_id, user in user_map.items():
-        # Filter tasks for this user
-        user_tasks = [task for task in tasks if task.get("assigned_to") == user_id]
-        
-        if not user_tasks:
-            continue
-        
-        # Count missed (overdue) tasks by day
-        missed_tasks_by_day = {}
-        
-        for i in range(days):
-            day = start_date + timedelta(days=i)
-            day_str = day.strftime("%Y-%m-%d")
-            
-            # Count overdue tasks for this day
-            missed_count = sum(1 for task in user_tasks if 
-                              task.get("status") == "overdue" and 
-                              task.get("due_date") and 
-                              task["due_date"].date() == day.date())
-            
-            if missed_count > 0:
-                missed_tasks_by_day[day_str] = missed_count
-        
-        user_heatmaps.append(UserTaskHeatmap(
-            user_id=user_id,
-            user_name=user.get("full_name", "Unknown"),
-            missed_tasks_by_day=missed_tasks_by_day
-        ))
+    user_heatmaps = []
+    user_heatmap_matrix = None
+    if heatmap_format == "matrix":
+        user_heatmap_matrix = UserTaskHeatmapMatrix(
+            user_ids=heatmap_users,
+            user_names=user_names,
+            days=days_axis,
+            missed_tasks=missed_tasks.tolist()
+        )
+    else:
+        user_heatmaps = [
+            UserTaskHeatmap(user_id=user_id, user_name=user_name, missed_tasks_by_day=missed_by_day)
+            for user_id, user_name, missed_by_day in zip(heatmap_users, user_names, heatmap_rows(missed_tasks, days_axis))
+        ]
     
     # Build and return dashboard
     return AnalyticsDashboard(
         task_completion_trend=completion_trend,
         user_performances=user_performances,
         team_performance=team_performance,
-        user_heatmaps=user_heatmaps
+        user_heatmaps=user_heatmaps,
+        user_heatmap_matrix=user_heatmap_matrix
     )
 
 @router.get("/powerbi-data")
+@cached_response("powerbi-data")
 async def get_powerbi_data(days: int = 30, current_user = Depends(get_current_user)):
     """
     Get data for PowerBI integration in a format suitable for direct import.
@@ -201,13 +210,7 @@ async def get_powerbi_data(days: int = 30, current_user = Depends(get_current_us
     start_date = end_date - timedelta(days=days)
     
     # Get tasks within date range
-    tasks = await tasks_collection.find({
-        "$or": [
-            {"created_at": {"$gte": start_date}},
-            {"due_date": {"$gte": start_date}},
-            {"completed_at": {"$gte": start_date}}
-        ]
-    }).to_list(length=1000)
+    tasks = await tasks_collection.find(_in_date_range(start_date)).to_list(length=1000)
     
     # Get users
     users = await users_collection.find().to_list(length=100)
@@ -239,7 +242,135 @@ async def get_powerbi_data(days: int = 30, current_user = Depends(get_current_us
         "users": users
     }
 
+@router.get("/powerbi-data/stream")
+async def stream_powerbi_data(
+    days: int = 30,
+    format: str = Query("ndjson", pattern="^(ndjson|json)$"),
+    batch_size: int = Query(1000, ge=1, le=10000),
+    current_user = Depends(get_current_user)
+):
+    """
+    Stream the tasks of the PowerBI data feed as they are read.
+    
+    Tasks are read from the database in batches and written out as NDJSON
+    (one task per line) or, with format=json, as one JSON array, with user
+    names joined in. Unlike /powerbi-data there is no row limit and memory
+    use stays flat however many tasks are exported.
+    """
+    # Calculate date range
+    start_date = datetime.utcnow() - timedelta(days=days)
+    
+    # Only the names are needed to join users into the rows
+    users = await users_collection.find({}, {"full_name": 1}).to_list(length=None)
+    user_map = {str(user["_id"]): user.get("full_name", "Unknown") for user in users}
+    
+    cursor = tasks_collection.find(_in_date_range(start_date), batch_size=batch_size)
+    return StreamingResponse(
+        stream_powerbi_rows(cursor, user_map, json_array=format == "json", batch_size=batch_size),
+        media_type="application/json" if format == "json" else "application/x-ndjson"
+    )
+
+@router.get("/powerbi-data/parquet")
+async def export_powerbi_parquet(
+    days: int = 30,
+    since: Optional[datetime] = None,
+    destination: str = Query("download", pattern="^(download|directory)$"),
+    current_user = Depends(get_current_user)
+):
+    """
+    Export the PowerBI data as Parquet files with typed columns.
+    
+    The export contains tasks, users, the status and priority summaries,
+    user performance and the daily time series. With destination=download
+    the files are returned in a zip archive, with destination=directory
+    they are written to POWERBI_EXPORT_DIR on the server.
+    
+    Pass the watermark of the previous export as since for an incremental
+    export of only the tasks updated since then (plus all users) and the
+    ids of the tasks deleted since then. A watermark older than the kept
+    deletion log gives a full export. Every export returns its own
+    watermark, in the X-Export-Watermark header or the response body;
+    consecutive exports overlap slightly, so upsert the tasks by id.
+    """
+    query_started_at = datetime.utcnow()
+    watermark = next_watermark(query_started_at)
+    since = normalize_watermark(since)
+    if since is not None and needs_full_reload(since, query_started_at):
+        since = None
+    
+    deleted_task_ids = []
+    if since is not None:
+        query = changed_since_query(since)
+        deleted_task_ids = await deleted_since("tasks", since)
+    else:
+        query = _in_date_range(query_started_at - timedelta(days=days))
+    
+    tasks = await tasks_collection.find(query).to_list(length=None)
+    users = await users_collection.find({}, {"hashed_password": 0}).to_list(length=None)
+    
+    # Building and encoding the tables is CPU-bound, keep it off the event loop
+    tables = await run_in_threadpool(build_export_tables, tasks, users, days, since is not None, deleted_task_ids)
+    
+    if destination == "directory":
+        suffix = watermark.strftime("%Y%m%dT%H%M%S") if since is not None else None
+        files = await run_in_threadpool(write_parquet_export, tables, suffix=suffix)
+        return {"files": files, "watermark": watermark}
+    
+    content = await run_in_threadpool(parquet_archive, tables)
+    return Response(
+        content,
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": 'attachment; filename="powerbi_export.zip"',
+            "X-Export-Watermark": watermark.isoformat()
+        }
+    )
+
+@router.get("/powerbi-data/changes")
+async def get_powerbi_changes(since: Optional[datetime] = None, current_user = Depends(get_current_user)):
+    """
+    Change feed for incremental PowerBI refreshes.
+    
+    Returns the tasks and users updated since the since watermark and the
+    ids of tasks deleted since then, together with the watermark to pass
+    on the next call. Without a watermark, or with one older than the kept
+    deletion log, full is true and no changes are returned: reload the data
+    with /powerbi-data/stream or /powerbi-data/parquet, then continue with
+    the returned watermark.
+    
+    Consecutive feeds overlap slightly, so clients should upsert rows by id.
+    """
+    query_started_at = datetime.utcnow()
+    since = normalize_watermark(since)
+    watermark = next_watermark(query_started_at)
+    
+    if needs_full_reload(since, query_started_at):
+        return {"full": True, "tasks": [], "deleted_task_ids": [], "users": [], "watermark": watermark}
+    
+    tasks = await tasks_collection.find(changed_since_query(since)).to_list(length=None)
+    deleted_task_ids = await deleted_since("tasks", since)
+    users = await users_collection.find(changed_since_query(since), {"hashed_password": 0}).to_list(length=None)
+    
+    # Only the names of the users the changed tasks refer to are joined in
+    referenced_ids = {
+        ObjectId(str(task[field])) for task in tasks for field in ("created_by", "assigned_to")
+        if ObjectId.is_valid(str(task.get(field)))
+    }
+    referenced = []
+    if referenced_ids:
+        referenced = await users_collection.find({"_id": {"$in": list(referenced_ids)}}, {"full_name": 1}).to_list(length=None)
+    user_map = {str(user["_id"]): user.get("full_name", "Unknown") for user in referenced}
+    
+    return {
+        "full": False,
+        "tasks": [powerbi_task_row(task, user_map) for task in tasks],
+        "deleted_task_ids": deleted_task_ids,
+        "users": [{**user, "_id": str(user["_id"])} for user in users],
+        "watermark": watermark
+    }
+
 @router.get("/metrics/task-completion")
+@cached_response("task-completion")
 async def get_task_completion_metrics(days: int = 30, current_user = Depends(get_current_user)):
     """
     Get task completion metrics over time.
@@ -248,109 +379,63 @@ async def get_task_completion_metrics(days: int = 30, current_user = Depends(get
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days)
     
-    # Get tasks within date range
-    tasks = await tasks_collection.find({
-        "$or": [
-            {"created_at": {"$gte": start_date}},
-            {"due_date": {"$gte": start_date}},
-            {"completed_at": {"$gte": start_date}}
-        ]
-    }).to_list(length=1000)
+    # Read the daily rollup for the date range
+    totals = await daily_totals(start_date, end_date)
+    overdue_totals = await daily_totals(start_date, end_date, statuses=OVERDUE_STATUSES)
     
     # Generate daily metrics
     daily_metrics = []
+    overdue = 0
     
-    for i in range(days):
-        day = start_date + timedelta(days=i)
-        day_end = day + timedelta(days=1)
-        day_str = day.strftime("%Y-%m-%d")
-        
-        # Count metrics for this day
-        created = sum(1 for task in tasks if 
-                      task.get("created_at") and 
-                      day <= task["created_at"] < day_end)
-        
-        due = sum(1 for task in tasks if 
-                  task.get("due_date") and 
-                  day <= task["due_date"] < day_end)
+    for day in day_range(start_date, days):
+        counters = totals.get(day, {})
         
-        completed = sum(1 for task in tasks if 
-                         task.get("completed_at") and 
-                         day <= task["completed_at"] < day_end)
-        
-        overdue = sum(1 for task in tasks if 
-                      task.get("due_date") and 
-                      task["due_date"] < day_end and
-                      task.get("status") == "overdue")
+        # Overdue tasks due on or before this day
+        overdue += overdue_totals.get(day, {}).get("due", 0)
         
         daily_metrics.append({
-            "date": day_str,
-            "tasks_created": created,
-            "tasks_due": due,
-            "tasks_completed": completed,
+            "date": day.strftime("%Y-%m-%d"),
+            "tasks_created": counters.get("created", 0),
+            "tasks_due": counters.get("due", 0),
+            "tasks_completed": counters.get("completed", 0),
             "tasks_overdue": overdue
         })
     
     return daily_metrics
 
 @router.get("/metrics/user-performance")
+@cached_response("user-performance")
 async def get_user_performance_metrics(current_user = Depends(get_current_user)):
     """
     Get performance metrics for all users.
     """
-    # Get all tasks
-    tasks = await tasks_collection.find().to_list(length=1000)
+    # Read the per-user figures from the per-user rollup
+    rows = await user_totals()
     
     # Get users
     users = await users_collection.find().to_list(length=100)
     
-    # Process performance metrics for each user
-    user_metrics = []
-    
-    for user in users:
-        user_id = str(user["_id"])
-        user_tasks = [task for task in tasks if task.get("assigned_to") == user_id]
-        
-        if not user_tasks:
-            continue
-        
-        # Calculate metrics
-        tasks_total = len(user_tasks)
-        tasks_completed = sum(1 for task in user_tasks if task.get("status") == "complete")
-        tasks_overdue = sum(1 for task in user_tasks if task.get("status") == "overdue")
-        tasks_in_progress = sum(1 for task in user_tasks if task.get("status") == "in_progress")
-        
-        # Calculate average completion time
-        completion_times = []
-        for task in user_tasks:
-            if task.get("status") == "complete" and task.get("completed_at") and task.get("created_at"):
-                time_diff = task["completed_at"] - task["created_at"]
-                completion_times.append(time_diff.total_seconds() / 3600)  # Convert to hours
-        
-        avg_completion_time = None
-        if completion_times:
-            avg_completion_time = sum(completion_times) / len(completion_times)
-        
-        # Calculate on-time percentage
-        on_time_percentage = 0
-        if tasks_completed > 0:
-            on_time_tasks = sum(1 for task in user_tasks 
-                               if task.get("status") == "complete" and 
-                               task.get("completed_at") and 
-                               task.get("due_date") and 
-                               task["completed_at"] <= task["due_date"])
-            on_time_percentage = (on_time_tasks / tasks_completed) * 100
-        
-        user_metrics.append({
-            "user_id": user_id,
-            "user_name": user.get("full_name", "Unknown"),
-            "tasks_total": tasks_total,
-            "tasks_completed": tasks_completed,
-            "tasks_overdue": tasks_overdue,
-            "tasks_in_progress": tasks_in_progress,
-            "completion_rate": (tasks_completed / tasks_total * 100) if tasks_total > 0 else 0,
-            "on_time_percentage": on_time_percentage,
-            "avg_completion_time": avg_completion_time
-        })
+    return [
+        {
+            "user_id": record["user_id"],
+            "user_name": record["user_name"],
+            "tasks_total": record["tasks_total"],
+            "tasks_completed": record["tasks_completed"],
+            "tasks_overdue": record["tasks_overdue"],
+            "tasks_in_progress": record["tasks_in_progress"],
+            "completion_rate": record["completion_rate"],
+            "on_time_percentage": record["on_time_percentage"],
+            "avg_completion_time": record["average_completion_time"]
+        }
+        for record in user_metric_records(finalize_user_metrics(rows), users)
+    ]
+
+@router.get("/metrics/status-sweeper")
+async def get_status_sweeper_metrics(current_user = Depends(get_current_user)):
+    """
+    Get the state of the background sweeper marking overdue tasks as missed.
     
-    return user_metrics 
\ No newline at end of file
+    lag_seconds is the time since the last successful sweep started; overdue
+    counts can be behind by at most that much.
+    """
+    return status_sweeper.metrics()
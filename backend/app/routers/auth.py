@@ -63,7 +63,8 @@ async def register(request: Request):
                 email=data["email"],
                 password=data["password"],
                 full_name=data["full_name"],
-                company=data.get("company", "")
+                company=data.get("company", ""),
+                skills=data.get("skills", [])
             )
             logging.warning(f"Created UserCreate object: {user_data}")
         except Exception as e:
@@ -153,6 +154,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
         "email": user["email"],
         "full_name": user["full_name"],
         "company": user.get("company"),
+        "skills": user.get("skills", []),
         "created_at": user.get("created_at"),
         "is_active": user.get("is_active", True)
     }
@@ -1,12 +1,21 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, status
 from typing import List, Optional
 from datetime import datetime
-from ..models.task import Task, TaskCreate, TaskUpdate, TaskStatus
+from ..models.task import Task, TaskCreate, TaskUpdate, TaskStatus, OptimizationJob, TaskBatch, TaskBatchItemResult, TaskBatchResult
 from ..utils.auth import get_current_user
-from ..utils.task_optimization import optimize_task_allocation, sort_tasks_for_user, get_task_status
+from ..utils.task_optimization import SOLVERS
+from ..utils.incremental_allocation import incremental_allocator
+from ..utils.stopping import STOPPING_POLICIES
+from ..utils.bulk_writes import apply_assignments, merge_assignments, write_time, TASK_BATCH_MAX
+from ..utils.daily_stats import record_task_change, record_task_changes
+from ..utils.change_feed import record_deletion, record_deletions
+from ..utils.pagination import paginate, PAGE_SORT, TASK_PAGE_SIZE, TASK_PAGE_SIZE_MAX
+from ..utils.task_ranking import QUEUE_SORT, ranked_update, sort_rank
+from ..utils.optimizer_service import optimizer_service, ALLOCATION_MAX_TASKS, ALLOCATION_MAX_USERS, ALGORITHMS, DEAP_ALGORITHM, GENETIC_ALGORITHM, ISLAND_ALGORITHM
 from ..config.database import tasks_collection, users_collection
 from bson import ObjectId
-from ..utils.genetic_algorithm import TaskAllocationProblem, optimize_task_allocation
+from pymongo import DeleteOne, InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
 import random
 import logging
 
@@ -16,6 +25,12 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
+async def _repair_allocation(task_id: str, update_data: dict):
+    """Keep the incremental allocator in step with a single changed task"""
+    changes = incremental_allocator.update_task(task_id, update_data)
+    if changes:
+        await apply_assignments(tasks_collection, changes)
+
 @router.post("/", response_model=Task)
 async def create_task(task: TaskCreate, current_user = Depends(get_current_user)):
     # Prepare task for insertion
@@ -23,52 +38,78 @@ async def create_task(task: TaskCreate, current_user = Depends(get_current_user)
     task_dict["created_by"] = current_user.user_id
     task_dict["created_at"] = datetime.utcnow()
     task_dict["updated_at"] = task_dict["created_at"]
+    task_dict["sort_rank"] = sort_rank(task_dict)
     
     # Insert into database
     result = await tasks_collection.insert_one(task_dict)
+    await record_task_change(None, task_dict)
+    
+    task_dict["id"] = str(result.inserted_id)
     
-    # Get created task
-    created_task = await tasks_collection.find_one({"_id": result.inserted_id})
-    created_task["id"] = str(created_task["_id"])
+    # Place unassigned tasks with a local repair of the last optimized allocation
+    if not task_dict.get("assigned_to"):
+        changes = incremental_allocator.insert_task(task_dict)
+        if changes:
+            for updated_task in await apply_assignments(tasks_collection, changes):
+                if updated_task["id"] == task_dict["id"]:
+                    task_dict["assigned_to"] = updated_task["assigned_to"]
     
-    return Task(**created_task)
+    # The created task is what was inserted, no need to read it back
+    return Task(**task_dict)
+
+def _task_list_query(priority: Optional[str] = None, due_before: Optional[datetime] = None,
+                     assigned_to: Optional[str] = None) -> dict:
+    """Filter of the task list"""
+    query = {}
+    if priority:
+        query["priority"] = priority
+    if due_before:
+        query["due_date"] = {"$lte": due_before}
+    if assigned_to:
+        query["assigned_to"] = assigned_to
+    return query
 
 @router.get("/", response_model=List[Task])
 async def get_tasks(
+    response: Response,
     priority: Optional[str] = None,
     due_before: Optional[datetime] = None,
     assigned_to: Optional[str] = None,
     sort_optimized: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = Query(TASK_PAGE_SIZE, ge=1, le=TASK_PAGE_SIZE_MAX),
+    fields: Optional[str] = None,
+    include_total: bool = False,
     current_user = Depends(get_current_user)
 ):
+    """
+    List tasks one page at a time, ordered by due date.
+    
+    With sort_optimized and assigned_to the user's tasks are ordered as a
+    work queue instead: by status, priority and then due date.
+    The cursor of the next page is returned in the X-Next-Cursor header and,
+    with include_total, the number of matching tasks in X-Total-Count.
+    fields selects the optional fields (description, tags, assigned_to,
+    completed_at) to return; the ones left out are empty.
+    """
     logger.info(f"GET /tasks request received. User: {current_user.email}, Filters: priority={priority}, due_before={due_before}, assigned_to={assigned_to}")
     try:
         # Build query filter
-        query = {}
-        
-        if priority:
-            query["priority"] = priority
-        
-        if due_before:
-            query["due_date"] = {"$lte": due_before}
-            
-        if assigned_to:
-            query["assigned_to"] = assigned_to
+        query = _task_list_query(priority, due_before, assigned_to)
         
-        # Get tasks
+        # Get one page of tasks, in queue order if requesting optimized sorting
         logger.info(f"Executing tasks query with filter: {query}")
-        tasks = await tasks_collection.find(query).to_list(length=100)
+        sort = QUEUE_SORT if sort_optimized and assigned_to else PAGE_SORT
+        tasks = await paginate(tasks_collection, query, response, cursor, limit, fields, include_total, sort)
         logger.info(f"Found {len(tasks)} tasks")
         
         # Convert ObjectId to string for all tasks
         for task in tasks:
             task["id"] = str(task["_id"])
         
-        # If requesting optimized sorting
-        if sort_optimized and assigned_to:
-            tasks = sort_tasks_for_user(tasks, assigned_to)
-        
         return [Task(**task) for task in tasks]
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in get_tasks: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -88,8 +129,6 @@ async def get_task(task_id: str, current_user = Depends(get_current_user)):
             
         # Convert ObjectId to string for response
         task["id"] = str(task["_id"])
-        # Update task status based on current date
-        task["status"] = get_task_status(task)
         
         return Task(**task)
     except:
@@ -112,70 +151,269 @@ async def update_task(
     if update_data.get("status") == TaskStatus.COMPLETE:
         update_data["completed_at"] = datetime.utcnow()
     
-    # Perform update
+    # Perform update - the previous version is needed to move the task in the daily rollup
     try:
-        result = await tasks_collection.update_one(
+        old_task = await tasks_collection.find_one_and_update(
             {"_id": ObjectId(task_id)},
-            {"$set": update_data}
+            ranked_update(update_data),
+            return_document=ReturnDocument.BEFORE
         )
-        
-        if result.modified_count == 0:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Task not found"
-            )
-            
-        # Get updated task
-        updated_task = await tasks_collection.find_one({"_id": ObjectId(task_id)})
-        updated_task["id"] = str(updated_task["_id"])
-        
-        return Task(**updated_task)
     except:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid task ID or update data"
         )
+    
+    if old_task is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+    
+    # The update is committed from here on, the bookkeeping must not turn it into an error
+    updated_task = {**old_task, **update_data}
+    updated_task["sort_rank"] = sort_rank(updated_task)
+    await record_task_change(old_task, updated_task)
+    
+    try:
+        await _repair_allocation(task_id, update_data)
+    except Exception as e:
+        logger.error(f"Error repairing the allocation of task {task_id}: {str(e)}", exc_info=True)
+    
+    updated_task["id"] = str(updated_task["_id"])
+    
+    return Task(**updated_task)
+
+def _creator_filter(task_id: str, user_id: str) -> dict:
+    """Filter matching a task only if the user created it"""
+    return {"_id": ObjectId(task_id), "created_by": user_id}
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_task(task_id: str, current_user = Depends(get_current_user)):
+    # Delete the task - only the creator can delete it
     try:
-        # Check if task exists
-        task = await tasks_collection.find_one({"_id": ObjectId(task_id)})
-        if not task:
+        task = await tasks_collection.find_one_and_delete(_creator_filter(task_id, current_user.user_id))
+    except:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid task ID"
+        )
+    
+    if not task:
+        # Nothing deleted - tell a missing task from someone else's
+        if await tasks_collection.count_documents({"_id": ObjectId(task_id)}, limit=1) == 0:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Task not found"
             )
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to delete this task"
+        )
+    
+    # The delete is committed from here on, the bookkeeping must not turn it into an error
+    await record_task_change(task, None)
+    try:
+        await record_deletion("tasks", task_id)
+    except Exception as e:
+        logger.error(f"Error recording the deletion of task {task_id}: {str(e)}", exc_info=True)
+    
+    try:
+        changes = incremental_allocator.remove_task(task_id)
+        if changes:
+            await apply_assignments(tasks_collection, changes)
+    except Exception as e:
+        logger.error(f"Error repairing the allocation of task {task_id}: {str(e)}", exc_info=True)
+    
+    return None
+
+@router.post("/batch", response_model=TaskBatchResult)
+async def batch_tasks(batch: TaskBatch, current_user = Depends(get_current_user)):
+    """
+    Create, update and delete many tasks with one bulk write.
+    
+    Every item gets its own result; items that fail (invalid or unknown ids,
+    another user's task to delete, write errors) don't stop the others.
+    Updates and deletes only apply to the version of the task the batch
+    read, a task changed by another request in between gets a conflict.
+    """
+    if len(batch.create) + len(batch.update) + len(batch.delete) > TASK_BATCH_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A batch can have at most {TASK_BATCH_MAX} operations"
+        )
+    
+    now = write_time()
+    results = []
+    # (operation, result, old task, new task, update data) of each write, in bulk write order
+    writes = []
+    
+    # Read the current versions of the updated and deleted tasks in one query
+    # - they are needed for the daily rollup and the delete permission check
+    ids = [item.id for item in batch.update] + batch.delete
+    current = {}
+    valid_ids = [ObjectId(task_id) for task_id in ids if ObjectId.is_valid(task_id)]
+    if valid_ids:
+        async for task in tasks_collection.find({"_id": {"$in": valid_ids}}):
+            current[str(task["_id"])] = task
+    
+    def check(result: TaskBatchItemResult, seen: set):
+        """Find the current version of the task of an update or delete, or mark the item failed"""
+        if not ObjectId.is_valid(result.id):
+            result.status = "invalid_id"
+        elif result.id not in current:
+            result.status = "not_found"
+        elif result.id in seen:
+            result.status = "error"
+            result.error = "Task is changed more than once in the batch"
+        else:
+            seen.add(result.id)
+            return current[result.id]
+        return None
+    
+    # Creates
+    for index, task in enumerate(batch.create):
+        task_dict = task.dict()
+        task_dict.update(_id=ObjectId(), created_by=current_user.user_id, created_at=now, updated_at=now)
+        task_dict["sort_rank"] = sort_rank(task_dict)
+        result = TaskBatchItemResult(operation="create", index=index, id=str(task_dict["_id"]), status="ok")
+        results.append(result)
+        writes.append((InsertOne(task_dict), result, None, task_dict, None))
+    
+    # Updates
+    seen = set()
+    for index, item in enumerate(batch.update):
+        result = TaskBatchItemResult(operation="update", index=index, id=item.id, status="ok")
+        results.append(result)
+        old_task = check(result, seen)
+        if old_task is None:
+            continue
         
-        # Only the creator can delete a task
-        if task["created_by"] != current_user.user_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to delete this task"
-            )
+        update_data = item.dict(exclude_unset=True, exclude={"id"})
+        update_data["updated_at"] = now
+        if update_data.get("status") == TaskStatus.COMPLETE:
+            update_data["completed_at"] = now
+        updated_task = {**old_task, **update_data}
+        updated_task["sort_rank"] = sort_rank(updated_task)
+        writes.append((UpdateOne(_version_filter(old_task), ranked_update(update_data)), result, old_task, updated_task, update_data))
+    
+    # Deletes - only the creator can delete a task
+    for index, task_id in enumerate(batch.delete):
+        result = TaskBatchItemResult(operation="delete", index=index, id=task_id, status="ok")
+        results.append(result)
+        old_task = check(result, seen)
+        if old_task is None:
+            continue
+        if old_task.get("created_by") != current_user.user_id:
+            result.status = "forbidden"
+            result.error = "Not authorized to delete this task"
+            continue
+        writes.append((DeleteOne(_version_filter(old_task)), result, old_task, None, None))
+    
+    # Write everything in one unordered bulk write
+    failed_writes = {}
+    counts = {}
+    if writes:
+        try:
+            counts = (await tasks_collection.bulk_write([write[0] for write in writes], ordered=False)).bulk_api_result
+        except BulkWriteError as e:
+            failed_writes = {error["index"]: error.get("errmsg", "Write failed") for error in e.details.get("writeErrors", [])}
+            counts = e.details
+    for position in await _batch_conflicts(writes, failed_writes, counts, now):
+        failed_writes[position] = None
+    
+    # Record the successful writes and keep the incremental allocator in step
+    changes = []
+    deleted_ids = []
+    allocation = []
+    tasks_by_id = {}
+    for position, (_, result, old_task, new_task, update_data) in enumerate(writes):
+        if position in failed_writes:
+            if failed_writes[position] is None:
+                result.status = "conflict"
+                result.error = "Task was changed by another request"
+            else:
+                result.status = "error"
+                result.error = failed_writes[position]
+            continue
         
-        # Delete the task
-        await tasks_collection.delete_one({"_id": ObjectId(task_id)})
+        changes.append((old_task, new_task))
+        if new_task is None:
+            deleted_ids.append(result.id)
+            allocation.append(incremental_allocator.remove_task(result.id))
+            continue
         
-        return None
-    except:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid task ID"
-        )
+        new_task["id"] = result.id
+        tasks_by_id[result.id] = new_task
+        if old_task is None:
+            if not new_task.get("assigned_to"):
+                allocation.append(incremental_allocator.insert_task(new_task))
+        else:
+            allocation.append(incremental_allocator.update_task(result.id, update_data))
+    
+    await record_task_changes(changes)
+    await record_deletions("tasks", deleted_ids)
+    for updated_task in await apply_assignments(tasks_collection, merge_assignments(*allocation)):
+        if updated_task["id"] in tasks_by_id:
+            tasks_by_id[updated_task["id"]]["assigned_to"] = updated_task["assigned_to"]
+    
+    for result in results:
+        if result.status == "ok" and result.id in tasks_by_id:
+            result.task = Task(**tasks_by_id[result.id])
+    
+    succeeded = [result.operation for result in results if result.status == "ok"]
+    return TaskBatchResult(
+        created=succeeded.count("create"),
+        updated=succeeded.count("update"),
+        deleted=succeeded.count("delete"),
+        failed=len(results) - len(succeeded),
+        results=results
+    )
 
-@router.post("/optimize-allocation", response_model=List[Task])
-async def optimize_tasks(current_user = Depends(get_current_user)):
+def _version_filter(task: dict) -> dict:
+    """Filter matching a task only while it's still the version that was read"""
+    return {"_id": task["_id"], "updated_at": task.get("updated_at"), "status": task.get("status")}
+
+async def _batch_conflicts(writes: List, failed_writes: dict, counts: dict, now: datetime) -> set:
     """
-    Use genetic algorithm to optimize task allocation to users.
+    Find the updates and deletes of a batch that didn't apply because their task changed since it was read.
+    
+    The bulk write result only has totals, so the tasks are read back only
+    when fewer writes matched than were sent. Applied updates are the tasks
+    now stamped with the batch's updated_at, applied deletes the tasks gone.
+    
+    Returns:
+        Positions of the writes that didn't apply
     """
-    # Get unassigned tasks
-    unassigned_tasks = await tasks_collection.find({
-        "assigned_to": None
-    }).to_list(length=100)
+    sent = [(position, write) for position, write in enumerate(writes)
+            if position not in failed_writes and write[2] is not None]
+    updates = sum(1 for _, write in sent if write[3] is not None)
+    if counts.get("nMatched", 0) >= updates and counts.get("nRemoved", 0) >= len(sent) - updates:
+        return set()
+    
+    stamps = {
+        task["_id"]: task.get("updated_at")
+        async for task in tasks_collection.find({"_id": {"$in": [write[2]["_id"] for _, write in sent]}}, {"updated_at": 1})
+    }
+    conflicts = set()
+    for position, (_, _, old_task, new_task, _) in sent:
+        task_id = old_task["_id"]
+        applied = task_id not in stamps if new_task is None else stamps.get(task_id) == now
+        if not applied:
+            conflicts.add(position)
+    return conflicts
+
+# Tasks and users an allocation run works on
+UNASSIGNED_QUERY = {"assigned_to": None}
+ACTIVE_USERS_QUERY = {"is_active": True}
+
+async def _load_allocation_problem():
+    """Fetch the unassigned tasks and active users an allocation run works on (up to the configured limits)"""
+    # Get unassigned tasks, the earliest due first if they are capped
+    unassigned_tasks = await tasks_collection.find(UNASSIGNED_QUERY).sort(PAGE_SORT).to_list(length=ALLOCATION_MAX_TASKS or None)
     
     # Get active users
-    users = await users_collection.find({"is_active": True}).to_list(length=50)
+    users = await users_collection.find(ACTIVE_USERS_QUERY).to_list(length=ALLOCATION_MAX_USERS or None)
     
     # Convert ObjectIds to strings for both tasks and users
     for task in unassigned_tasks:
@@ -184,50 +422,182 @@ async def optimize_tasks(current_user = Depends(get_current_user)):
     for user in users:
         user["id"] = str(user["_id"])
     
+    return unassigned_tasks, users
+
+async def _apply_optimized_allocation(users, assignments) -> List[dict]:
+    """
+    Write the (task_id, user_id) assignments of an optimizer run over unassigned tasks.
+    
+    Only tasks that are still unassigned and open are written, and the
+    incremental allocator is seeded with the assignments that applied.
+    """
+    updated_tasks = await apply_assignments(tasks_collection, assignments)
+    
+    # Later single-task changes are repaired incrementally from this allocation
+    incremental_allocator.reset(users, [(task["id"], task["assigned_to"]) for task in updated_tasks], updated_tasks)
+    return updated_tasks
+
+def _job_response(job) -> OptimizationJob:
+    """Convert an optimizer job record to its API representation"""
+    allocation = job["allocation"]
+    if allocation is not None:
+        allocation = [{"task_id": task_id, "user_id": user_id} for task_id, user_id in allocation]
+    return OptimizationJob(**{**job, "allocation": allocation})
+
+def _island_options(islands: int, migration_interval: int, seed: int):
+    """Island model settings passed through to the optimizer"""
+    return {"islands": islands, "migration_interval": migration_interval, "seed": seed}
+
+def _stopping_policy(policy: str, max_generations: Optional[int], patience: Optional[int],
+                     time_budget: Optional[float], target_fitness: Optional[float]):
+    """Build the stopping policy of a run from a preset and optional overrides"""
+    if policy not in STOPPING_POLICIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown stopping policy, expected one of: {', '.join(STOPPING_POLICIES)}"
+        )
+    return STOPPING_POLICIES[policy].replace(
+        max_generations=max_generations, patience=patience,
+        time_budget=time_budget, target_fitness=target_fitness
+    )
+
+def _check_solver(solver: str):
+    if solver not in SOLVERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown solver, expected one of: {', '.join(SOLVERS)}"
+        )
+
+@router.post("/optimize-allocation", response_model=List[Task])
+async def optimize_tasks(
+    solver: str = "ga",
+    islands: int = Query(1, ge=1, le=64),
+    migration_interval: int = Query(10, ge=1),
+    seed: int = 0,
+    policy: str = "interactive",
+    max_generations: Optional[int] = Query(None, ge=1),
+    patience: Optional[int] = Query(None, ge=1),
+    time_budget: Optional[float] = Query(None, gt=0),
+    target_fitness: Optional[float] = None,
+    current_user = Depends(get_current_user)
+):
+    """
+    Optimize task allocation to users.
+    
+    The solver is the DEAP genetic algorithm ("ga"), the exact capacity-constrained
+    assignment ("min_cost_flow") or greedy with local search ("greedy").
+    With the "ga" solver and islands > 1 the island model is used: that many
+    sub-populations evolve in parallel processes and exchange elites every
+    migration_interval generations.
+    
+    The genetic algorithm stops on the "interactive" policy by default (no
+    improvement for 15 generations or 200 ms); the preset can be changed
+    with policy and each limit overridden with its own parameter.
+    """
+    _check_solver(solver)
+    stopping = _stopping_policy(policy, max_generations, patience, time_budget, target_fitness)
+    unassigned_tasks, users = await _load_allocation_problem()
+    
     # Skip optimization if no tasks or users
     if not unassigned_tasks or not users:
         return []
     
-    # Optimize task allocation
-    assignments = optimize_task_allocation(unassigned_tasks, users)
+    # Optimize task allocation in the worker pool so the event loop stays responsive
+    if solver == "ga" and islands > 1:
+        assignments = await optimizer_service.run(
+            ISLAND_ALGORITHM, unassigned_tasks, users,
+            options={**_island_options(islands, migration_interval, seed), "stopping": stopping}
+        )
+    else:
+        assignments = await optimizer_service.run(
+            DEAP_ALGORITHM, unassigned_tasks, users, options={"solver": solver, "stopping": stopping}
+        )
     
     # Update tasks with assigned users
-    updated_tasks = []
-    for task_id, user_id in assignments:
-        # Update in database
-        await tasks_collection.update_one(
-            {"_id": ObjectId(task_id)},
-            {"$set": {"assigned_to": user_id, "updated_at": datetime.utcnow()}}
+    return [Task(**task) for task in await _apply_optimized_allocation(users, assignments)]
+
+@router.post("/optimize-allocation/jobs", response_model=OptimizationJob, status_code=status.HTTP_202_ACCEPTED)
+async def create_optimization_job(
+    algorithm: str = DEAP_ALGORITHM,
+    solver: str = "ga",
+    islands: int = Query(4, ge=1, le=64),
+    migration_interval: int = Query(10, ge=1),
+    seed: int = 0,
+    policy: str = "batch",
+    max_generations: Optional[int] = Query(None, ge=1),
+    patience: Optional[int] = Query(None, ge=1),
+    time_budget: Optional[float] = Query(None, gt=0),
+    target_fitness: Optional[float] = None,
+    current_user = Depends(get_current_user)
+):
+    """
+    Start a background task allocation job.
+    
+    Returns immediately with a job id; poll the job to follow progress per
+    generation and get the final allocation, which is applied to the tasks
+    once the job completes. The solver only applies to the "deap" algorithm
+    and the island settings only to the "island" algorithm.
+    
+    Jobs use the "batch" stopping policy by default (no improvement for 200
+    generations or 30 s); overrides work as for /optimize-allocation.
+    """
+    if algorithm not in ALGORITHMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown algorithm, expected one of: {', '.join(ALGORITHMS)}"
         )
-        
-        # Get updated task
-        updated_task = await tasks_collection.find_one({"_id": ObjectId(task_id)})
-        updated_task["id"] = str(updated_task["_id"])
-        updated_tasks.append(Task(**updated_task))
+    _check_solver(solver)
+    stopping = _stopping_policy(policy, max_generations, patience, time_budget, target_fitness)
     
-    return updated_tasks
+    unassigned_tasks, users = await _load_allocation_problem()
+    
+    async def apply_job_result(assignments):
+        await _apply_optimized_allocation(users, assignments)
+    
+    options = {"stopping": stopping}
+    if algorithm == ISLAND_ALGORITHM:
+        options.update(_island_options(islands, migration_interval, seed))
+    elif algorithm == DEAP_ALGORITHM:
+        options["solver"] = solver
+    job = optimizer_service.submit_job(
+        algorithm, unassigned_tasks, users, on_complete=apply_job_result, options=options
+    )
+    
+    return _job_response(job)
+
+@router.get("/optimize-allocation/jobs/{job_id}", response_model=OptimizationJob)
+async def get_optimization_job(job_id: str, current_user = Depends(get_current_user)):
+    """
+    Get the status, progress and result of a background allocation job.
+    """
+    job = optimizer_service.get_job(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Optimization job not found"
+        )
+    
+    return _job_response(job)
 
 @router.get("/user/{user_id}/optimized", response_model=List[Task])
 async def get_optimized_tasks_for_user(
     user_id: str, 
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(TASK_PAGE_SIZE, ge=1, le=TASK_PAGE_SIZE_MAX),
     current_user = Depends(get_current_user)
 ):
     """
-    Get optimally sorted tasks for a specific user.
+    Get optimally sorted tasks for a specific user, one page at a time.
     """
-    # Get user's tasks
-    tasks = await tasks_collection.find({
-        "assigned_to": user_id
-    }).to_list(length=100)
+    # Get user's tasks, already in queue order
+    tasks = await paginate(tasks_collection, {"assigned_to": user_id}, response, cursor, limit, sort=QUEUE_SORT)
     
     # Convert ObjectId to string for all tasks
     for task in tasks:
         task["id"] = str(task["_id"])
     
-    # Sort tasks optimally
-    sorted_tasks = sort_tasks_for_user(tasks, user_id)
-    
-    return [Task(**task) for task in sorted_tasks]
+    return [Task(**task) for task in tasks]
 
 @router.get("/optimize-tasks")
 async def optimize_tasks():
@@ -239,15 +609,15 @@ async def optimize_tasks():
         if not tasks or not users:
             return {"message": "No tasks or users available for optimization", "allocation": {}}
         
-        # Run the optimization algorithm
-        optimized_allocation = optimize_task_allocation(tasks, users)
+        # Run the optimization algorithm in the worker pool
+        optimized_allocation = dict(await optimizer_service.run(GENETIC_ALGORITHM, tasks, users))
         
-        # Update tasks in the database with the optimized allocation
-        for task_id, user_id in optimized_allocation.items():
-            await tasks_collection.update_one(
-                {"_id": ObjectId(task_id)},
-                {"$set": {"assigned_to": user_id}}
-            )
+        # Update tasks in the database with the optimized allocation, unless they were reassigned meanwhile
+        current_assignees = {str(task["_id"]): task.get("assigned_to") for task in tasks}
+        await apply_assignments(
+            tasks_collection,
+            [(task_id, user_id, current_assignees.get(task_id)) for task_id, user_id in optimized_allocation.items()]
+        )
         
         return {
             "message": "Tasks optimized successfully",
@@ -260,14 +630,20 @@ async def optimize_tasks():
         )
 
 @router.get("/debug/no-auth", response_model=List[Task])
-async def get_tasks_debug():
+async def get_tasks_debug(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(TASK_PAGE_SIZE, ge=1, le=TASK_PAGE_SIZE_MAX),
+    fields: Optional[str] = None,
+    include_total: bool = False
+):
     """
     Debug endpoint to get tasks without authentication.
     Only for development - should be removed in production.
     """
     logger.info("DEBUG endpoint accessed - fetching tasks without auth")
     try:
-        tasks = await tasks_collection.find({}).to_list(length=100)
+        tasks = await paginate(tasks_collection, {}, response, cursor, limit, fields, include_total)
         
         # Convert ObjectId to string for all tasks
         for task in tasks:
@@ -275,6 +651,8 @@ async def get_tasks_debug():
         
         logger.info(f"DEBUG endpoint found {len(tasks)} tasks")
         return [Task(**task) for task in tasks]
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in debug endpoint: {str(e)}", exc_info=True)
         raise HTTPException(
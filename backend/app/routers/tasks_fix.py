@@ -1,10 +1,20 @@
-from fastapi import APIRouter, HTTPException, Depends, status, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, status, BackgroundTasks
 from typing import List, Optional
 from datetime import datetime
 from ..models.task import Task, TaskCreate, TaskUpdate, TaskStatus
 from ..utils.auth import get_current_user
 from ..config.database import tasks_collection, db
+from ..utils.daily_stats import record_task_change
+from ..utils.bulk_writes import apply_assignments
+from ..utils.incremental_allocation import incremental_allocator
+from ..utils.change_feed import (
+    changed_since_query, decode_sync_token, deleted_since, encode_sync_token, needs_full_reload, next_watermark,
+    record_deletion
+)
+from ..utils.pagination import paginate, TASK_PAGE_SIZE, TASK_PAGE_SIZE_MAX
+from ..utils.task_ranking import ranked_update, sort_rank
 from bson import ObjectId
+from pymongo import ReturnDocument
 import logging
 import smtplib
 from email.mime.text import MIMEText
@@ -17,6 +27,9 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/tasks-fix", tags=["Tasks Fix"])
 
+# Newest activities first
+ACTIVITY_SORT = [("timestamp", -1)]
+
 # Add Activity model
 class Activity(BaseModel):
     action: str
@@ -103,19 +116,28 @@ async def get_tasks_simple():
     return {"message": "Simple tasks endpoint working!"}
 
 @router.get("/", response_model=List[Task])
-async def get_tasks(current_user = Depends(get_current_user)):
+async def get_tasks(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(TASK_PAGE_SIZE, ge=1, le=TASK_PAGE_SIZE_MAX),
+    fields: Optional[str] = None,
+    include_total: bool = False,
+    current_user = Depends(get_current_user)
+):
     """
-    Get all tasks with authentication
+    Get all tasks with authentication, one page at a time
     """
     logger.info(f"GET /tasks-fix/ endpoint called by user: {current_user.email}")
     try:
-        tasks = await tasks_collection.find({}).to_list(length=100)
+        tasks = await paginate(tasks_collection, {}, response, cursor, limit, fields, include_total)
         
         # Convert ObjectId to string for all tasks
         for task in tasks:
             task["id"] = str(task["_id"])
         
         return [Task(**task) for task in tasks]
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in get_tasks: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -124,19 +146,27 @@ async def get_tasks(current_user = Depends(get_current_user)):
         )
 
 @router.get("/debug", response_model=List[Task])
-async def get_tasks_debug():
+async def get_tasks_debug(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(TASK_PAGE_SIZE, ge=1, le=TASK_PAGE_SIZE_MAX),
+    fields: Optional[str] = None,
+    include_total: bool = False
+):
     """
-    Get all tasks without authentication - for debugging
+    Get all tasks without authentication, one page at a time - for debugging
     """
     logger.info("GET /tasks-fix/debug endpoint called")
     try:
-        tasks = await tasks_collection.find({}).to_list(length=100)
+        tasks = await paginate(tasks_collection, {}, response, cursor, limit, fields, include_total)
         
         # Convert ObjectId to string for all tasks
         for task in tasks:
             task["id"] = str(task["_id"])
         
         return [Task(**task) for task in tasks]
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in get_tasks_debug: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -146,16 +176,24 @@ async def get_tasks_debug():
 
 # Test endpoint to check if response_model is causing issues
 @router.get("/list-test", response_model=List[Task])
-async def get_tasks_list_test():
+async def get_tasks_list_test(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(TASK_PAGE_SIZE, ge=1, le=TASK_PAGE_SIZE_MAX),
+    fields: Optional[str] = None,
+    include_total: bool = False
+):
     """List endpoint for testing the response model without auth"""
     try:
-        tasks = await tasks_collection.find({}).to_list(length=100)
+        tasks = await paginate(tasks_collection, {}, response, cursor, limit, fields, include_total)
         
         # Convert ObjectId to string for all tasks
         for task in tasks:
             task["id"] = str(task["_id"])
         
         return [Task(**task) for task in tasks]
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in get_tasks_list_test: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -175,10 +213,17 @@ async def save_task(task: TaskCreate):
         task_dict["created_by"] = "anonymous"
         task_dict["created_at"] = datetime.utcnow()
         task_dict["updated_at"] = task_dict["created_at"]
+        task_dict["sort_rank"] = sort_rank(task_dict)
         
         result = await tasks_collection.insert_one(task_dict)
-        created_task = await tasks_collection.find_one({"_id": result.inserted_id})
-        created_task["id"] = str(created_task["_id"])
+        await record_task_change(None, task_dict)
+        created_task = {**task_dict, "id": str(result.inserted_id)}
+        
+        # Place unassigned tasks with a local repair of the last optimized allocation
+        if not created_task.get("assigned_to"):
+            for updated_task in await apply_assignments(tasks_collection, incremental_allocator.insert_task(created_task)):
+                if updated_task["id"] == created_task["id"]:
+                    created_task["assigned_to"] = updated_task["assigned_to"]
         
         # Record activity
         await save_activity(
@@ -205,25 +250,30 @@ async def update_task_no_auth(task_id: str, task_update: TaskUpdate):
         update_data = task_update.dict(exclude_unset=True)
         update_data["updated_at"] = datetime.utcnow()
         
-        # Get the task before update
-        old_task = await tasks_collection.find_one({"_id": ObjectId(task_id)})
-        
         if update_data.get("status") == TaskStatus.COMPLETE:
             update_data["completed_at"] = datetime.utcnow()
         
-        result = await tasks_collection.update_one(
+        # Update and get the task before the update in one round trip
+        old_task = await tasks_collection.find_one_and_update(
             {"_id": ObjectId(task_id)},
-            {"$set": update_data}
+            ranked_update(update_data),
+            return_document=ReturnDocument.BEFORE
         )
         
-        if result.modified_count == 0:
+        if old_task is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Task not found"
             )
         
-        updated_task = await tasks_collection.find_one({"_id": ObjectId(task_id)})
-        updated_task["id"] = str(updated_task["_id"])
+        updated_task = {**old_task, **update_data, "id": task_id}
+        updated_task["sort_rank"] = sort_rank(updated_task)
+        await record_task_change(old_task, updated_task)
+        
+        # Keep the incremental allocation in step with the change
+        changes = incremental_allocator.update_task(task_id, update_data)
+        if changes:
+            await apply_assignments(tasks_collection, changes)
         
         # Record activity for status change
         if "status" in update_data and old_task:
@@ -243,19 +293,29 @@ async def update_task_no_auth(task_id: str, task_update: TaskUpdate):
         )
 
 @router.get("/sync", response_model=List[Task])
-async def sync_tasks():
+async def sync_tasks(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(TASK_PAGE_SIZE, ge=1, le=TASK_PAGE_SIZE_MAX),
+    fields: Optional[str] = None,
+    include_total: bool = False
+):
     """
     Sync all tasks from the database (no auth required)
-    Use this to refresh local storage with server data
+    Use this to refresh local storage with server data, following
+    the X-Next-Cursor header until the last page; afterwards keep it
+    up to date with /sync/changes
     """
     try:
-        tasks = await tasks_collection.find({}).to_list(length=100)
+        tasks = await paginate(tasks_collection, {}, response, cursor, limit, fields, include_total)
         
         # Convert ObjectId to string for all tasks
         for task in tasks:
             task["id"] = str(task["_id"])
         
         return [Task(**task) for task in tasks]
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error syncing tasks: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -263,6 +323,56 @@ async def sync_tasks():
             detail=f"Error syncing tasks: {str(e)}"
         )
 
+# Model for delta syncs
+class TaskSyncDelta(BaseModel):
+    full: bool
+    tasks: List[Task]
+    deleted_ids: List[str]
+    token: str
+
+@router.get("/sync/changes", response_model=TaskSyncDelta)
+async def sync_task_changes(token: Optional[str] = None):
+    """
+    Delta sync of the tasks (no auth required)
+    
+    Returns the tasks inserted or updated and the ids of the tasks deleted
+    since the sync token, and the token to send on the next sync. Without a
+    token, or with one older than the kept deletion log, full is true and no
+    changes are returned: reload everything with /sync, then continue with
+    the returned token. Consecutive syncs overlap slightly, so apply the
+    tasks as upserts by id.
+    """
+    try:
+        query_started_at = datetime.utcnow()
+        since = decode_sync_token(token)
+        next_token = encode_sync_token(next_watermark(query_started_at))
+        
+        if needs_full_reload(since, query_started_at):
+            return TaskSyncDelta(full=True, tasks=[], deleted_ids=[], token=next_token)
+        
+        # Only the changes, from the updated_at index and the tombstones
+        tasks = await tasks_collection.find(changed_since_query(since)).to_list(length=None)
+        deleted_ids = await deleted_since("tasks", since)
+        
+        # Convert ObjectId to string for all tasks
+        for task in tasks:
+            task["id"] = str(task["_id"])
+        
+        return TaskSyncDelta(
+            full=False,
+            tasks=[Task(**task) for task in tasks],
+            deleted_ids=deleted_ids,
+            token=next_token
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error syncing task changes: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error syncing task changes: {str(e)}"
+        )
+
 # Add a users endpoint to fix the 405 Method Not Allowed error
 @router.get("/users", response_model=List[dict])
 async def get_users():
@@ -294,17 +404,23 @@ async def delete_task(task_id: str):
     Delete a task without authentication (for testing)
     """
     try:
-        # Get task before deletion
-        task = await tasks_collection.find_one({"_id": ObjectId(task_id)})
-        
-        result = await tasks_collection.delete_one({"_id": ObjectId(task_id)})
+        # Delete and get the deleted task in one round trip
+        task = await tasks_collection.find_one_and_delete({"_id": ObjectId(task_id)})
         
-        if result.deleted_count == 0:
+        if task is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Task not found"
             )
         
+        await record_task_change(task, None)
+        await record_deletion("tasks", task_id)
+        
+        # Rebalance the work of the deleted task's assignee
+        changes = incremental_allocator.remove_task(task_id)
+        if changes:
+            await apply_assignments(tasks_collection, changes)
+        
         # Record activity
         if task:
             await save_activity(
@@ -330,6 +446,10 @@ class TaskStats(BaseModel):
     pending: int
     missed: int
 
+def _task_stats_query(user_id: str) -> dict:
+    """Filter of the tasks a user's statistics count ("all" for every task)"""
+    return {} if user_id == "all" else {"assigned_to": user_id}
+
 @router.get("/task-stats/{user_id}", response_model=TaskStats)
 async def get_task_stats(user_id: str):
     """
@@ -337,10 +457,7 @@ async def get_task_stats(user_id: str):
     """
     try:
         # Get all tasks for the user
-        if user_id == "all":
-            tasks = await tasks_collection.find({}).to_list(length=100)
-        else:
-            tasks = await tasks_collection.find({"assigned_to": user_id}).to_list(length=100)
+        tasks = await tasks_collection.find(_task_stats_query(user_id)).to_list(length=100)
         
         # Initialize counters
         stats = {
@@ -377,7 +494,7 @@ async def get_recent_activities():
     Get recent activities
     """
     try:
-        activities = await db.activities.find().sort("timestamp", -1).limit(10).to_list(length=10)
+        activities = await db.activities.find().sort(ACTIVITY_SORT).limit(10).to_list(length=10)
         for activity in activities:
             activity["_id"] = str(activity["_id"])
         return activities
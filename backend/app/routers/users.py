@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from typing import List
+from datetime import datetime
 from ..models.user import User, UserUpdate
 from ..utils.auth import get_current_user, get_password_hash
 from ..config.database import users_collection
@@ -52,6 +53,7 @@ async def update_user(
     
     # Prepare update data
     update_data = user_update.dict(exclude_unset=True)
+    update_data["updated_at"] = datetime.utcnow()
     
     # Hash password if provided
     if "password" in update_data:
@@ -0,0 +1,166 @@
+import numpy as np
+from scipy.optimize import linprog
+from scipy.sparse import coo_matrix, vstack
+from typing import List, Optional, Union
+
+# Deterministic alternatives to the genetic algorithm for task allocation.
+# Both solvers minimise the same objective as task_optimization.evaluate_population
+# (task costs plus workload balance) and return one user index per task.
+
+def pairwise_costs(task_costs: np.ndarray, num_users: int,
+                   skill_costs: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Build the (tasks x users) cost of assigning each task to each user.
+
+    Args:
+        task_costs: Per-task costs from task_optimization.compute_task_costs
+        num_users: Number of users tasks can be assigned to
+        skill_costs: Optional (tasks x users) matrix of user-specific costs
+
+    Returns:
+        Float matrix of assignment costs
+    """
+    costs = np.repeat(np.asarray(task_costs, dtype=np.float64)[:, None], num_users, axis=1)
+    if skill_costs is not None:
+        costs += skill_costs
+    return costs
+
+def _capacity_bounds(num_tasks: int, num_users: int, capacity: Union[int, np.ndarray, None]):
+    """
+    Lower and upper bound on the number of tasks per user.
+
+    Without an explicit capacity, every user gets floor(n/m) or ceil(n/m)
+    tasks, which is the best possible workload balance.
+    """
+    if capacity is None:
+        return (np.full(num_users, num_tasks // num_users),
+                np.full(num_users, -(-num_tasks // num_users)))
+
+    upper = np.broadcast_to(np.asarray(capacity), (num_users,)).astype(np.int64)
+    if upper.sum() < num_tasks:
+        raise ValueError("Total user capacity is smaller than the number of tasks")
+    return np.zeros(num_users, dtype=np.int64), upper
+
+def solve_min_cost_flow(task_costs: np.ndarray, num_users: int,
+                        skill_costs: Optional[np.ndarray] = None,
+                        capacity: Union[int, np.ndarray, None] = None) -> List[int]:
+    """
+    Exact min-cost assignment with a capacity per user.
+
+    Tasks with identical cost rows are merged into one supply node, and the
+    resulting transportation problem (a min-cost flow) is solved as a linear
+    program. Its constraint matrix is totally unimodular, so the simplex
+    solution is integral.
+
+    Args:
+        task_costs: Per-task costs from task_optimization.compute_task_costs
+        num_users: Number of users tasks can be assigned to
+        skill_costs: Optional (tasks x users) matrix of user-specific costs
+        capacity: Maximum tasks per user (scalar or per-user array); defaults to an even split
+
+    Returns:
+        List with the index of the assigned user for each task
+    """
+    num_tasks = len(task_costs)
+    if num_tasks == 0 or num_users == 0:
+        return []
+
+    costs = pairwise_costs(task_costs, num_users, skill_costs)
+
+    # Merge tasks that cost the same for every user
+    groups, group_of_task, group_sizes = np.unique(costs, axis=0, return_inverse=True, return_counts=True)
+    group_of_task = group_of_task.ravel()
+    num_groups = len(groups)
+
+    # Variable x[g, u] = number of tasks of group g assigned to user u
+    variables = np.arange(num_groups * num_users)
+    supply = coo_matrix(
+        (np.ones(variables.size), (variables // num_users, variables)),
+        shape=(num_groups, variables.size)
+    )
+    demand = coo_matrix(
+        (np.ones(variables.size), (variables % num_users, variables)),
+        shape=(num_users, variables.size)
+    )
+    lower, upper = _capacity_bounds(num_tasks, num_users, capacity)
+
+    result = linprog(
+        groups.ravel(),
+        A_ub=vstack([demand, -demand]).tocsr(),
+        b_ub=np.concatenate([upper, -lower]),
+        A_eq=supply.tocsr(),
+        b_eq=group_sizes,
+        bounds=(0, None),
+        method="highs-ds"
+    )
+    if not result.success:
+        raise ValueError(f"Assignment problem could not be solved: {result.message}")
+
+    flows = np.rint(result.x).astype(np.int64).reshape(num_groups, num_users)
+
+    # Hand out each group's tasks to users according to the flow
+    allocation = np.empty(num_tasks, dtype=np.int64)
+    for group in range(num_groups):
+        members = np.flatnonzero(group_of_task == group)
+        allocation[members] = np.repeat(np.arange(num_users), flows[group])
+
+    return allocation.tolist()
+
+def solve_greedy(task_costs: np.ndarray, num_users: int,
+                 skill_costs: Optional[np.ndarray] = None,
+                 capacity: Union[int, np.ndarray, None] = None,
+                 max_passes: int = 3) -> List[int]:
+    """
+    Greedy assignment followed by a local search.
+
+    Tasks with the largest spread between their best and worst user are
+    placed first on the cheapest user with free capacity. The local search
+    then moves single tasks between users while that lowers the total cost.
+
+    Args:
+        task_costs: Per-task costs from task_optimization.compute_task_costs
+        num_users: Number of users tasks can be assigned to
+        skill_costs: Optional (tasks x users) matrix of user-specific costs
+        capacity: Maximum tasks per user (scalar or per-user array); defaults to an even split
+        max_passes: Maximum number of local search passes over all tasks
+
+    Returns:
+        List with the index of the assigned user for each task
+    """
+    num_tasks = len(task_costs)
+    if num_tasks == 0 or num_users == 0:
+        return []
+
+    costs = pairwise_costs(task_costs, num_users, skill_costs)
+    lower, upper = _capacity_bounds(num_tasks, num_users, capacity)
+
+    # Greedy construction - most constrained tasks first
+    order = np.argsort(-(costs.max(axis=1) - costs.min(axis=1)), kind="stable")
+    allocation = np.empty(num_tasks, dtype=np.int64)
+    loads = np.zeros(num_users, dtype=np.int64)
+    for task in order:
+        # Prefer cheaper users, break ties towards the least loaded one
+        candidates = np.where(loads < upper, costs[task] + loads * 1e-6, np.inf)
+        user = int(np.argmin(candidates))
+        allocation[task] = user
+        loads[user] += 1
+
+    # Local search - move a task to a cheaper user if capacities allow it
+    for _ in range(max_passes):
+        improved = False
+        for task in range(num_tasks):
+            current = allocation[task]
+            if loads[current] <= lower[current]:
+                continue
+            delta = costs[task] - costs[task, current]
+            delta[loads >= upper] = np.inf
+            user = int(np.argmin(delta))
+            if delta[user] < 0:
+                allocation[task] = user
+                loads[current] -= 1
+                loads[user] += 1
+                improved = True
+        if not improved:
+            break
+
+    return allocation.tolist()
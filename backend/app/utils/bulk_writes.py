@@ -0,0 +1,112 @@
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from .daily_stats import record_task_changes
+from .performance_metrics import COMPLETED_STATUSES, OVERDUE_STATUSES
+
+# Bulk write helpers - apply many task changes in a few round trips
+# instead of one update and one read per task.
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", 1000))
+
+# Maximum number of operations in one request to the batch task API
+TASK_BATCH_MAX = int(os.getenv("TASK_BATCH_MAX", 1000))
+
+# Tasks that are done are never (re)assigned by an allocation
+CLOSED_STATUSES = COMPLETED_STATUSES + OVERDUE_STATUSES
+
+def write_time() -> datetime:
+    """Current time at the millisecond precision MongoDB stores, so writes can be found by it afterwards"""
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _with_expected(assignment: Sequence) -> Tuple[str, str, Optional[str]]:
+    """(task_id, user_id[, expected_assignee]) with the expected assignee defaulting to unassigned"""
+    task_id, user_id = assignment[0], assignment[1]
+    return task_id, user_id, assignment[2] if len(assignment) > 2 else None
+
+def assignment_filter(task_id: str, expected: Optional[str]) -> Dict:
+    """Filter matching a task only while it's open and still has the assignee an allocation expects"""
+    return {"_id": ObjectId(task_id), "assigned_to": expected, "status": {"$nin": CLOSED_STATUSES}}
+
+async def apply_assignments(collection, assignments: Iterable[Sequence],
+                            chunk_size: int = BULK_CHUNK_SIZE) -> List[Dict]:
+    """
+    Write task assignments computed from an earlier snapshot of the tasks.
+
+    An assignment only applies while the task still has the assignee it was
+    computed from - none for optimizer runs, or the expected assignee given
+    as third element - and isn't closed, so tasks assigned by hand,
+    re-assigned, completed or deleted in the meantime are left alone.
+
+    Each chunk is one unordered bulk write of conditional updates. The bulk
+    write result only has totals, so the tasks are read back in one query to
+    find the ones now carrying the chunk's assignment and write time; their
+    previous version is the same document with the expected assignee, so
+    the daily rollup is moved only for the writes that applied.
+
+    Args:
+        collection: Tasks collection to write to
+        assignments: Iterable of (task_id, user_id) or (task_id, user_id, expected_assignee) tuples
+        chunk_size: Maximum number of updates per bulk write
+
+    Returns:
+        The updated task documents (with an "id" field) of the assignments that applied, in assignment order
+    """
+    assignments = [_with_expected(assignment) for assignment in assignments]
+    if not assignments:
+        return []
+
+    updated = []
+    for chunk in _chunks(assignments, max(1, chunk_size)):
+        # Stamped per chunk so the writes aren't older than change feed watermarks handed out meanwhile
+        now = write_time()
+        await collection.bulk_write([
+            UpdateOne(
+                assignment_filter(task_id, expected),
+                {"$set": {"assigned_to": user_id, "updated_at": now}}
+            )
+            for task_id, user_id, expected in chunk
+        ], ordered=False)
+
+        # Every task write sets updated_at, so a task still stamped now has exactly this chunk's change
+        written = {
+            str(task["_id"]): task
+            async for task in collection.find({"_id": {"$in": [ObjectId(task_id) for task_id, _, _ in chunk]}, "updated_at": now})
+        }
+
+        changes = []
+        for task_id, user_id, expected in chunk:
+            task = written.get(task_id)
+            if task is None or task.get("assigned_to") != user_id:
+                continue  # Changed since the allocation was computed
+            document = {**task, "id": task_id}
+            changes.append(({**task, "assigned_to": expected}, document))
+            updated.append(document)
+        await record_task_changes(changes)
+
+    return updated
+
+def merge_assignments(*assignment_lists: Iterable[Sequence]) -> List[Tuple[str, str, Optional[str]]]:
+    """
+    Merge successive assignment changes into one write per task.
+
+    A task moved more than once ends at its last assignee and is still
+    expected to have the assignee of its first change.
+    """
+    merged: Dict[str, Tuple[str, str, Optional[str]]] = {}
+    for assignments in assignment_lists:
+        for assignment in assignments:
+            task_id, user_id, expected = _with_expected(assignment)
+            if task_id in merged:
+                expected = merged[task_id][2]
+            merged[task_id] = (task_id, user_id, expected)
+    return list(merged.values())
@@ -0,0 +1,86 @@
+import os
+import base64
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException, status
+
+from ..config.database import TOMBSTONE_RETENTION_DAYS, tombstones_collection
+
+# Change feed support: deletions are recorded as tombstones so clients that
+# sync incrementally by updated_at also learn about removed documents.
+
+# Writes stamp updated_at before they are committed, so the next watermark is
+# moved back by this much to not miss writes that were in flight during a query
+CHANGE_FEED_SKEW_SECONDS = float(os.getenv("CHANGE_FEED_SKEW_SECONDS", 5))
+
+async def record_deletions(collection: str, document_ids: List[str]):
+    """
+    Record deleted documents in the tombstone log.
+
+    Args:
+        collection: Name of the collection the documents were deleted from
+        document_ids: String ids of the deleted documents
+    """
+    if not document_ids:
+        return
+    deleted_at = datetime.utcnow()
+    await tombstones_collection.insert_many([
+        {"collection": collection, "document_id": document_id, "deleted_at": deleted_at}
+        for document_id in document_ids
+    ])
+
+async def record_deletion(collection: str, document_id: str):
+    """Record one deleted document in the tombstone log"""
+    await record_deletions(collection, [document_id])
+
+def deleted_since_query(collection: str, since: datetime) -> Dict:
+    """Query for the tombstones of a collection's documents deleted at or after since"""
+    return {"collection": collection, "deleted_at": {"$gte": since}}
+
+async def deleted_since(collection: str, since: datetime) -> List[str]:
+    """Ids of the documents of a collection deleted at or after since"""
+    cursor = tombstones_collection.find(deleted_since_query(collection, since), {"document_id": 1})
+    return [tombstone["document_id"] async for tombstone in cursor]
+
+def normalize_watermark(since: Optional[datetime]) -> Optional[datetime]:
+    """Convert a client watermark to the naive UTC datetimes stored in the database"""
+    if since is not None and since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    return since
+
+def next_watermark(query_started_at: datetime) -> datetime:
+    """Watermark to hand out for changes read by a query started at query_started_at"""
+    return query_started_at - timedelta(seconds=CHANGE_FEED_SKEW_SECONDS)
+
+def needs_full_reload(since: Optional[datetime], now: Optional[datetime] = None) -> bool:
+    """True if there is no watermark or it is older than the kept tombstones"""
+    if since is None:
+        return True
+    now = now or datetime.utcnow()
+    return since < now - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+
+def changed_since_query(since: Optional[datetime]) -> Dict:
+    """Query for the documents updated at or after since (all documents without a watermark)"""
+    return {} if since is None else {"updated_at": {"$gte": since}}
+
+def encode_sync_token(watermark: datetime) -> str:
+    """Opaque sync token holding a watermark"""
+    return base64.urlsafe_b64encode(watermark.isoformat().encode()).decode().rstrip("=")
+
+def decode_sync_token(token: Optional[str]) -> Optional[datetime]:
+    """
+    Get the watermark held by a sync token (None without a token).
+
+    Raises:
+        HTTPException: If the token wasn't produced by encode_sync_token
+    """
+    if not token:
+        return None
+    try:
+        return datetime.fromisoformat(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode())
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sync token"
+        )
@@ -0,0 +1,243 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from ..config.database import INDEXES, db, daily_task_stats_collection, tasks_collection, user_task_stats_collection
+from .performance_metrics import USER_ROLLUP_METRICS_PIPELINE
+from .response_cache import analytics_cache
+
+logger = logging.getLogger(__name__)
+
+# Daily task rollup: pre-aggregated counters per (day, user, priority, status)
+# kept in step with every task write, so analytics read a few rows per day
+# instead of the whole task history.
+#
+# A task contributes to up to three rows, all keyed by its current user,
+# priority and status: "created" on the day it was created, "due" on its due
+# day and "completed" (with on-time count and completion hours) on the day it
+# was completed. A task change is applied as new contributions minus old ones.
+#
+# A second, per-user rollup keeps the same kind of counters per (user, status)
+# without the day, so per-user metrics read a few rows per user however long
+# the task history is.
+
+COUNTERS = ("created", "due", "completed", "on_time", "completion_hours")
+
+DAILY_KEY = ("day", "user", "priority", "status")
+USER_KEY = ("user", "status")
+
+# Suffix of the collections a backfill builds the rollups in before swapping them in
+STAGING_SUFFIX = "_rebuild"
+
+def _value(value):
+    """Plain value of enums stored in task documents"""
+    return getattr(value, "value", value)
+
+def _naive_utc(value):
+    """Datetimes as the naive UTC stored in the database - request data can be timezone aware"""
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def day_start(value: datetime) -> datetime:
+    """Midnight (UTC) of the day a datetime falls on"""
+    return datetime(value.year, value.month, value.day)
+
+def task_contributions(task: Optional[Dict]) -> Dict[Tuple, Dict[str, float]]:
+    """
+    Counters a single task adds to the rollup.
+
+    Returns:
+        Dict mapping (day, user, priority, status) keys to counter increments
+    """
+    contributions = defaultdict(lambda: defaultdict(int))
+    if not task:
+        return contributions
+
+    def key(day):
+        return (day_start(day), task.get("assigned_to"), _value(task.get("priority")), _value(task.get("status")))
+
+    created_at, due_date, completed_at = (_naive_utc(task.get(field)) for field in ("created_at", "due_date", "completed_at"))
+    if isinstance(created_at, datetime):
+        contributions[key(created_at)]["created"] += 1
+    if isinstance(due_date, datetime):
+        contributions[key(due_date)]["due"] += 1
+    if isinstance(completed_at, datetime):
+        counters = contributions[key(completed_at)]
+        counters["completed"] += 1
+        if isinstance(due_date, datetime) and completed_at <= due_date:
+            counters["on_time"] += 1
+        if isinstance(created_at, datetime):
+            counters["completion_hours"] += (completed_at - created_at).total_seconds() / 3600
+
+    return contributions
+
+def user_contributions(task: Optional[Dict]) -> Dict[Tuple, Dict[str, float]]:
+    """
+    Counters a single task adds to the per-user rollup.
+
+    Returns:
+        Dict mapping the (user, status) key to counter increments: tasks, and
+        for completed tasks on_time plus completion_hours of the timed ones
+    """
+    if not task:
+        return {}
+
+    created_at, due_date, completed_at = (_naive_utc(task.get(field)) for field in ("created_at", "due_date", "completed_at"))
+    counters = {"tasks": 1}
+    if isinstance(completed_at, datetime):
+        if isinstance(due_date, datetime) and completed_at <= due_date:
+            counters["on_time"] = 1
+        if isinstance(created_at, datetime):
+            counters["timed"] = 1
+            counters["completion_hours"] = (completed_at - created_at).total_seconds() / 3600
+
+    return {(task.get("assigned_to"), _value(task.get("status"))): counters}
+
+def _rollup_updates(changes: Iterable[Tuple[Optional[Dict], Optional[Dict]]],
+                    contributions, key_fields: Tuple[str, ...]) -> List[UpdateOne]:
+    deltas = defaultdict(lambda: defaultdict(int))
+    for old, new in changes:
+        for sign, task in ((-1, old), (1, new)):
+            for key, counters in contributions(task).items():
+                for counter, amount in counters.items():
+                    deltas[key][counter] += sign * amount
+
+    updates = []
+    for key, counters in deltas.items():
+        increments = {counter: amount for counter, amount in counters.items() if amount}
+        if not increments:
+            continue
+        updates.append(UpdateOne(dict(zip(key_fields, key)), {"$inc": increments}, upsert=True))
+    return updates
+
+def rollup_updates(changes: Iterable[Tuple[Optional[Dict], Optional[Dict]]]) -> List[UpdateOne]:
+    """
+    Build the $inc upserts of the daily rollup for a batch of task changes.
+
+    Args:
+        changes: (old task, new task) pairs - old is None for inserts, new is None for deletes
+
+    Returns:
+        List of UpdateOne operations for the rollup collection
+    """
+    return _rollup_updates(changes, task_contributions, DAILY_KEY)
+
+def user_rollup_updates(changes: Iterable[Tuple[Optional[Dict], Optional[Dict]]]) -> List[UpdateOne]:
+    """Build the $inc upserts of the per-user rollup for a batch of task changes"""
+    return _rollup_updates(changes, user_contributions, USER_KEY)
+
+async def record_task_changes(changes: Iterable[Tuple[Optional[Dict], Optional[Dict]]]):
+    """
+    Apply a batch of (old task, new task) changes to the rollups.
+
+    Every task write goes through here, so this is also where cached
+    analytics responses are invalidated. It's called after the task write
+    has been committed, so a failure is logged rather than raised - the
+    rollup can be rebuilt with `python maintenance.py backfill-daily-stats`.
+    """
+    try:
+        await _write_rollup(changes)
+    except Exception as e:
+        logger.error(f"Error updating the daily task rollup: {str(e)}", exc_info=True)
+    finally:
+        analytics_cache.invalidate()
+
+async def _write_rollup(changes: Iterable[Tuple[Optional[Dict], Optional[Dict]]],
+                        daily_collection=daily_task_stats_collection,
+                        user_collection=user_task_stats_collection):
+    changes = list(changes)
+    for collection, updates in ((daily_collection, rollup_updates(changes)),
+                                (user_collection, user_rollup_updates(changes))):
+        if updates:
+            await collection.bulk_write(updates, ordered=False)
+
+async def record_task_change(old: Optional[Dict], new: Optional[Dict]):
+    """Apply one task change to the rollup - old is None for inserts, new is None for deletes"""
+    await record_task_changes([(old, new)])
+
+async def daily_totals(start_date: datetime, end_date: datetime,
+                       statuses: Optional[List[str]] = None) -> Dict[datetime, Dict[str, float]]:
+    """
+    Sum the rollup counters per day.
+
+    Args:
+        start_date: First day to include
+        end_date: Last day to include
+        statuses: Only count tasks with one of these statuses
+
+    Returns:
+        Dict mapping each day (midnight) with data to its summed counters
+    """
+    rows = await daily_task_stats_collection.aggregate(
+        daily_totals_pipeline(start_date, end_date, statuses)
+    ).to_list(length=None)
+
+    return {row.pop("_id"): row for row in rows}
+
+def daily_totals_pipeline(start_date: datetime, end_date: datetime,
+                          statuses: Optional[List[str]] = None) -> List[Dict]:
+    """Aggregation summing the rollup counters per day (see daily_totals)"""
+    query = {"day": {"$gte": day_start(start_date), "$lte": day_start(end_date)}}
+    if statuses is not None:
+        query["status"] = {"$in": statuses}
+    return [
+        {"$match": query},
+        {"$group": {"_id": "$day", **{counter: {"$sum": f"${counter}"} for counter in COUNTERS}}}
+    ]
+
+async def user_totals() -> List[Dict]:
+    """
+    Raw per-user figures from the per-user rollup.
+
+    Returns:
+        One row per user with tasks, in the shape of USER_METRICS_GROUP, for finalize_user_metrics
+    """
+    return await user_task_stats_collection.aggregate(USER_ROLLUP_METRICS_PIPELINE).to_list(length=None)
+
+def day_range(start_date: datetime, days: int) -> List[datetime]:
+    """Midnight of each day in a range of days starting at start_date"""
+    first = day_start(start_date)
+    return [first + timedelta(days=i) for i in range(days)]
+
+async def backfill_daily_stats(batch_size: int = 1000) -> int:
+    """
+    Rebuild the daily and per-user rollups from all existing tasks.
+
+    The rollups are built in staging collections and swapped in with one
+    rename each, so analytics read the old rollups until the new ones are
+    complete and task writes during the rebuild are never counted twice.
+    Writes during the rebuild are missing from the new rollups though, so
+    stop the API (and with it the status sweeper) while it runs.
+
+    Returns:
+        Number of tasks processed
+    """
+    live = (daily_task_stats_collection, user_task_stats_collection)
+    staging = []
+    for collection in live:
+        staging_collection = db[collection.name + STAGING_SUFFIX]
+        await staging_collection.drop()
+        for keys, options in INDEXES[collection.name]:
+            await staging_collection.create_index(keys, **options)
+        staging.append(staging_collection)
+
+    processed, batch = 0, []
+    async for task in tasks_collection.find({}, batch_size=batch_size):
+        batch.append((None, task))
+        if len(batch) >= batch_size:
+            await _write_rollup(batch, *staging)
+            processed += len(batch)
+            batch = []
+
+    if batch:
+        await _write_rollup(batch, *staging)
+        processed += len(batch)
+
+    for staging_collection, collection in zip(staging, live):
+        await staging_collection.rename(collection.name, dropTarget=True)
+    analytics_cache.invalidate()
+    return processed
@@ -1,134 +1,190 @@
-import random
+import numpy as np
 from datetime import datetime
 
+from .stopping import StoppingPolicy
+
 # Define the task allocation problem
 class TaskAllocationProblem:
+    """
+    Allocation problem with a per-task score vector computed once up front.
+    
+    Populations are int32 matrices (population size x tasks) where each row
+    is an allocation: index=task, value=user.
+    """
+    
     def __init__(self, tasks, users):
         self.tasks = tasks
         self.users = users
-        
+        self.num_users = len(users)
+        self.task_scores = self.compute_task_scores(tasks)
+    
+    @classmethod
+    def from_scores(cls, task_scores, num_users):
+        """Rebuild a problem from a precomputed score vector, without the documents"""
+        problem = cls.__new__(cls)
+        problem.tasks = None
+        problem.users = None
+        problem.num_users = num_users
+        problem.task_scores = np.asarray(task_scores, dtype=np.float64)
+        return problem
+    
+    @property
+    def num_tasks(self):
+        return len(self.task_scores)
+    
     def get_priority_value(self, priority):
         """Convert priority string to numeric value"""
         if isinstance(priority, str):
             priorities = {"Low": 1, "Medium": 2, "High": 3}
             return priorities.get(priority, 1)
         return 1  # Default priority if not found
-        
-    def get_days_until_due(self, due_date):
+    
+    def get_days_until_due(self, due_date, now=None):
         """Calculate days until due date"""
         if not due_date:
             return 30  # Default if no due date
-            
+        
         try:
             if isinstance(due_date, str):
                 due = datetime.fromisoformat(due_date.replace('Z', '+00:00'))
             else:
                 due = due_date
-                
-            now = datetime.now()
+            
+            now = now or datetime.now()
             days = (due - now).days
             return max(0, days)  # Ensure non-negative
         except (ValueError, TypeError):
             return 30  # Default if error parsing date
-
-    def fitness(self, allocation):
+    
+    def compute_task_scores(self, tasks):
         """
-        Calculate the fitness of a given allocation
+        Score every task once - the score of an allocation is the sum of
+        the scores of the tasks it assigns to a valid user.
+        
+        Returns:
+            Float array with one score per task
+        """
+        now = datetime.now()
+        
+        # Calculate priority score (higher priority = higher score)
+        priority_values = np.array(
+            [self.get_priority_value(task.get('priority', 'Medium')) for task in tasks], dtype=np.float64
+        )
+        
+        # Calculate urgency score (closer due date = higher score)
+        days_until_due = np.array(
+            [self.get_days_until_due(task.get('due_date'), now) for task in tasks], dtype=np.float64
+        )
+        urgency_scores = np.maximum(1, 30 - days_until_due) / 30  # Normalize to 0-1
+        
+        # Combine factors (customize weights as needed)
+        return (priority_values * 3) * urgency_scores
+    
+    def fitness(self, population):
+        """
+        Calculate the fitness of an allocation or of every row of a population
         Higher value means better allocation
         """
-        total_fitness = 0
+        population = np.asarray(population)
+        num_tasks = min(population.shape[-1], self.num_tasks)
+        allocations = population[..., :num_tasks]
         
-        for task_idx, user_idx in enumerate(allocation):
-            if task_idx >= len(self.tasks) or user_idx >= len(self.users):
-                continue
-                
-            task = self.tasks[task_idx]
-            user = self.users[user_idx]
-            
-            # Calculate priority score (higher priority = higher score)
-            priority_value = self.get_priority_value(task.get('priority', 'Medium'))
-            
-            # Calculate urgency score (closer due date = higher score)
-            days_until_due = self.get_days_until_due(task.get('due_date'))
-            urgency_score = max(1, 30 - days_until_due) / 30  # Normalize to 0-1
-            
-            # Combine factors (customize weights as needed)
-            task_score = (priority_value * 3) * urgency_score
-            
-            total_fitness += task_score
-            
-        return total_fitness
-
-    def mutate(self, allocation):
-        """Randomly change part of the allocation"""
-        if not allocation or not self.users:
+        # Tasks assigned to a user that doesn't exist don't count
+        valid = (allocations >= 0) & (allocations < self.num_users)
+        return valid @ self.task_scores[:num_tasks]
+    
+    def random_population(self, population_size):
+        """Random allocations as a (population size x tasks) int32 matrix"""
+        return np.random.randint(0, self.num_users, size=(population_size, self.num_tasks)).astype(np.int32)
+    
+    def mutate(self, population):
+        """Randomly change one position of every allocation in place"""
+        if population.size == 0 or not self.num_users:
             return
-            
-        # Choose a random position to mutate
-        pos = random.randint(0, len(allocation) - 1)
-        # Assign a random user
-        allocation[pos] = random.randint(0, len(self.users) - 1)
-
-    def crossover(self, parent1, parent2):
-        """Combine two allocations to create a new one"""
-        if not parent1 or not parent2:
-            return parent1 or parent2 or []
-            
-        crossover_point = len(parent1) // 2
-        child = parent1[:crossover_point] + parent2[crossover_point:]
-        return child
+        
+        # Choose a random position per allocation and assign a random user
+        rows = np.arange(len(population))
+        positions = np.random.randint(0, population.shape[1], size=len(population))
+        population[rows, positions] = np.random.randint(0, self.num_users, size=len(population))
+    
+    def crossover(self, parents1, parents2):
+        """Combine pairs of allocations (one pair per row) into children"""
+        crossover_point = parents1.shape[1] // 2
+        return np.concatenate([parents1[:, :crossover_point], parents2[:, crossover_point:]], axis=1)
 
-def optimize_task_allocation(tasks, users, population_size=20, generations=50):
+def evolve_allocation(problem, population_size=20, generations=50, progress=None, stopping=None):
     """
-    Run the genetic algorithm to optimize task allocation
+    Run the genetic algorithm for a task allocation problem
     
     Args:
-        tasks: List of task objects with id, priority, due_date
-        users: List of user objects with id
+        problem: TaskAllocationProblem to solve
         population_size: Size of the population (default: 20)
         generations: Number of generations to run (default: 50)
-        
+        progress: Optional callback called as progress(generation, generations, best_fitness)
+        stopping: Optional StoppingPolicy, replaces the fixed number of generations
+    
     Returns:
-        Dict mapping task IDs to user IDs for the best allocation
+        List with the index of the assigned user for each task - the best
+        allocation seen, even if the run was stopped early
     """
-    # Initialize the problem
-    problem = TaskAllocationProblem(tasks, users)
+    if not problem.num_tasks or not problem.num_users:
+        return []
     
-    # Convert object IDs to indices for easier handling
-    task_id_to_idx = {task.get('_id', i): i for i, task in enumerate(tasks)}
-    user_id_to_idx = {user.get('_id', i): i for i, user in enumerate(users)}
+    if stopping is None:
+        stopping = StoppingPolicy(max_generations=generations)
+    generations = stopping.max_generations
+    tracker = stopping.start(minimize=False)
+    best_allocation, best_score = None, None
     
-    # Initialize population - each individual is a list where index=task, value=user
-    population = []
-    for _ in range(population_size):
-        individual = [random.randint(0, len(users)-1) for _ in range(len(tasks))]
-        population.append(individual)
+    # Initialize population - each row is an allocation where index=task, value=user
+    population = problem.random_population(population_size)
+    num_selected = max(5, population_size // 2)
     
     # Run the genetic algorithm
     for generation in range(generations):
         # Evaluate fitness
-        fitness_scores = [problem.fitness(allocation) for allocation in population]
+        fitness_scores = problem.fitness(population)
         
-        # Select the best solutions - ensure non-zero weights
-        weights = [max(0.1, score) for score in fitness_scores]
-        selected = random.choices(population, weights=weights, k=max(5, population_size//2))
+        # Keep the best allocation seen so far
+        best_idx = int(np.argmax(fitness_scores))
+        if best_score is None or fitness_scores[best_idx] > best_score:
+            best_allocation, best_score = population[best_idx].copy(), float(fitness_scores[best_idx])
         
-        # Generate new population
-        new_population = []
-        while len(new_population) < population_size:
-            if len(selected) >= 2:
-                parent1, parent2 = random.sample(selected, 2)
-                child = problem.crossover(parent1, parent2)
-                problem.mutate(child)
-                new_population.append(child)
-            else:
-                # Not enough parents, just copy the existing ones
-                new_population.extend(selected)
+        if progress:
+            progress(generation + 1, generations, best_score)
+        if tracker.update(generation + 1, best_score):
+            break
+        
+        # Select the best solutions - ensure non-zero weights
+        weights = np.maximum(0.1, fitness_scores)
+        selected = population[np.random.choice(len(population), size=num_selected, p=weights / weights.sum())]
         
-        population = new_population[:population_size]
+        # Generate new population from pairs of distinct selected parents
+        first = np.random.randint(0, num_selected, size=population_size)
+        second = (first + np.random.randint(1, num_selected, size=population_size)) % num_selected
+        population = problem.crossover(selected[first], selected[second])
+        problem.mutate(population)
+    
+    return best_allocation.tolist()
+
+def optimize_task_allocation(tasks, users, population_size=20, generations=50, stopping=None):
+    """
+    Run the genetic algorithm to optimize task allocation
+    
+    Args:
+        tasks: List of task objects with id, priority, due_date
+        users: List of user objects with id
+        population_size: Size of the population (default: 20)
+        generations: Number of generations to run (default: 50)
+        stopping: Optional StoppingPolicy, replaces the fixed number of generations
+    
+    Returns:
+        Dict mapping task IDs to user IDs for the best allocation
+    """
+    # Initialize the problem
+    problem = TaskAllocationProblem(tasks, users)
     
-    # Get the best allocation
-    best_allocation = max(population, key=problem.fitness)
+    best_allocation = evolve_allocation(problem, population_size, generations, stopping=stopping)
     
     # Convert back to task_id -> user_id mapping
     result = {}
@@ -138,4 +194,4 @@ def optimize_task_allocation(tasks, users, population_size=20, generations=50):
             user_id = str(users[user_idx].get('_id', user_idx))
             result[task_id] = user_id
     
-    return result 
\ No newline at end of file
+    return result
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# Heatmap engine: counts per (user, day) cell as a dense users x days matrix.
+# Cells are placed with one vectorized scatter instead of looping over
+# users, days and tasks, and the matrix can be sent as is (with its row and
+# column labels) or expanded into per-user dicts of the non-zero days.
+
+def heatmap_matrix(row_labels: Sequence, column_labels: Sequence,
+                   rows: Iterable, columns: Iterable,
+                   counts: Optional[Iterable[int]] = None) -> np.ndarray:
+    """
+    Build a dense (rows x columns) int matrix from labelled cells.
+
+    Args:
+        row_labels: Labels of the matrix rows (e.g. user ids)
+        column_labels: Labels of the matrix columns (e.g. days)
+        rows: Row label of each cell
+        columns: Column label of each cell
+        counts: Count of each cell, 1 per cell if not given (e.g. one cell per task)
+
+    Returns:
+        Matrix of the summed counts; cells with unknown labels are dropped
+    """
+    row_index = pd.Index(list(row_labels))
+    column_index = pd.Index(list(column_labels))
+    matrix = np.zeros((len(row_index), len(column_index)), dtype=np.int64)
+
+    row_positions = row_index.get_indexer(list(rows))
+    column_positions = column_index.get_indexer(list(columns))
+    keep = (row_positions >= 0) & (column_positions >= 0)
+    values = 1 if counts is None else np.asarray(list(counts), dtype=np.int64)[keep]
+
+    # Unbuffered add so repeated cells are summed
+    np.add.at(matrix, (row_positions[keep], column_positions[keep]), values)
+    return matrix
+
+def heatmap_rows(matrix: np.ndarray, column_labels: Sequence[str]) -> List[Dict[str, int]]:
+    """Expand each matrix row into a dict of its non-zero cells keyed by column label"""
+    return [
+        {column_labels[column]: int(row[column]) for column in np.flatnonzero(row)}
+        for row in matrix
+    ]
+
+def day_labels(days: Iterable) -> List[str]:
+    """Format days as the "YYYY-MM-DD" column labels of a heatmap"""
+    return [day.strftime("%Y-%m-%d") for day in days]
@@ -0,0 +1,202 @@
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ..models.task import TaskStatus
+from .task_optimization import compute_skill_costs
+
+# Incremental task allocation: keeps the last optimized allocation in memory
+# and repairs it locally when a single task changes, instead of re-running
+# the full genetic algorithm.
+
+class IncrementalAllocator:
+    """
+    In-memory allocation state with local repair operations.
+
+    Tasks placed by the optimizer are movable; tasks that were assigned by
+    hand or have been started are pinned and only count towards workload.
+    Every write of a task should go through insert_task, update_task or
+    remove_task so the workloads match the database.
+    """
+
+    def __init__(self, max_moves: int = 20):
+        self.max_moves = max_moves
+        self.users: List[Dict] = []
+        self.user_ids: List[str] = []
+        self.workloads = np.zeros(0, dtype=np.int64)
+        self.assignments: Dict[str, int] = {}
+        self.pinned = set()
+        # Skill match cost of each known task for every user
+        self.skill_costs: Dict[str, np.ndarray] = {}
+
+    @property
+    def ready(self) -> bool:
+        """True once a full optimization has seeded the allocator"""
+        return bool(self.user_ids)
+
+    def reset(self, users: Sequence[Dict], assignments: List[Tuple[str, str]],
+              tasks: Optional[Sequence[Dict]] = None):
+        """
+        Seed the allocator with the result of a full optimization run.
+
+        Args:
+            users: User dictionaries (with id and skills) tasks can be assigned to
+            assignments: List of (task_id, user_id) tuples from the optimizer
+            tasks: Task dictionaries (with id and tags) of the assignments, for the skill costs
+        """
+        self.users = [{"id": user["id"], "skills": user.get("skills") or []} for user in users]
+        self.user_ids = [user["id"] for user in self.users]
+        user_index = {user_id: idx for idx, user_id in enumerate(self.user_ids)}
+
+        self.assignments = {
+            task_id: user_index[user_id]
+            for task_id, user_id in assignments
+            if user_id in user_index
+        }
+        self.pinned = set()
+        tasks = [task for task in tasks or [] if task["id"] in self.assignments]
+        self.skill_costs = dict(zip(
+            [task["id"] for task in tasks],
+            compute_skill_costs(tasks, self.users) if tasks else []
+        ))
+        self.workloads = np.bincount(
+            np.fromiter(self.assignments.values(), dtype=np.int64, count=len(self.assignments)),
+            minlength=len(self.user_ids)
+        )
+
+    def insert_task(self, task: Dict) -> List[Tuple[str, str, Optional[str]]]:
+        """
+        Place a new task with greedy insertion followed by local search.
+
+        Args:
+            task: The new task dictionary (with id and tags)
+
+        Returns:
+            List of (task_id, user_id, previous_user_id) assignments that changed, including the new task
+        """
+        if not self.ready:
+            return []
+
+        # Greedy insertion - the user with the lowest workload plus skill mismatch
+        task_id = task["id"]
+        self.skill_costs[task_id] = compute_skill_costs([task], self.users)[0]
+        user_idx = int(np.argmin(self.workloads + self.skill_costs[task_id]))
+
+        self.assignments[task_id] = user_idx
+        self.workloads[user_idx] += 1
+
+        # The new task is still unassigned in the database, wherever the rebalance put it
+        changes = self._rebalance()
+        changes[task_id] = (None, changes.get(task_id, (None, user_idx))[1])
+        return self._as_assignments(changes)
+
+    def remove_task(self, task_id: str) -> List[Tuple[str, str, Optional[str]]]:
+        """
+        Drop a completed or deleted task and repair the balance.
+
+        Returns:
+            List of (task_id, user_id, previous_user_id) assignments that changed
+        """
+        user_idx = self.assignments.pop(task_id, None)
+        self.pinned.discard(task_id)
+        self.skill_costs.pop(task_id, None)
+        if user_idx is None:
+            return []
+
+        self.workloads[user_idx] -= 1
+        return self._as_assignments(self._rebalance())
+
+    def update_task(self, task_id: str, update_data: Dict) -> List[Tuple[str, str, Optional[str]]]:
+        """
+        Keep the allocation in step with a changed task.
+
+        Completed, missed and unassigned tasks are dropped; tasks assigned by
+        hand or started are pinned.
+
+        Args:
+            task_id: Id of the task
+            update_data: The fields that were changed
+
+        Returns:
+            List of (task_id, user_id, previous_user_id) assignments that changed
+        """
+        task_status = update_data.get("status")
+        if task_status in (TaskStatus.COMPLETE, TaskStatus.MISSED) or (
+            "assigned_to" in update_data and update_data["assigned_to"] is None
+        ):
+            # The task no longer needs an assignee - rebalance the remaining work
+            return self.remove_task(task_id)
+        if "assigned_to" in update_data or task_status == TaskStatus.IN_PROGRESS:
+            # Assigned by hand or started - the allocator must not move it anymore
+            self.pin_task(task_id, update_data.get("assigned_to"))
+        return []
+
+    def pin_task(self, task_id: str, user_id: Optional[str] = None):
+        """
+        Record a task that must not be moved, e.g. assigned by hand or started.
+
+        Args:
+            task_id: Id of the task
+            user_id: New assignee, if the task was (re)assigned
+        """
+        if not self.ready:
+            return
+
+        if user_id is not None:
+            old_idx = self.assignments.pop(task_id, None)
+            if old_idx is not None:
+                self.workloads[old_idx] -= 1
+            if user_id in self.user_ids:
+                new_idx = self.user_ids.index(user_id)
+                self.assignments[task_id] = new_idx
+                self.workloads[new_idx] += 1
+
+        if task_id in self.assignments:
+            self.pinned.add(task_id)
+
+    def _rebalance(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Local search: move movable tasks from the busiest to the least busy
+        user while that reduces the spread of the workload. Of the movable
+        tasks of the busiest user, the one whose skill match suffers least
+        from the move is taken.
+
+        Returns:
+            Dict mapping moved tasks to their (first previous, new) user index
+        """
+        moves = {}
+        for _ in range(self.max_moves):
+            busiest, idlest = int(np.argmax(self.workloads)), int(np.argmin(self.workloads))
+            if self.workloads[busiest] - self.workloads[idlest] <= 1:
+                break
+
+            candidates = [
+                task_id for task_id, user_idx in self.assignments.items()
+                if user_idx == busiest and task_id not in self.pinned
+            ]
+            if not candidates:
+                break
+            movable = min(candidates, key=lambda task_id: self._move_cost(task_id, busiest, idlest))
+
+            self.assignments[movable] = idlest
+            self.workloads[busiest] -= 1
+            self.workloads[idlest] += 1
+            moves[movable] = (moves.get(movable, (busiest,))[0], idlest)
+
+        return moves
+
+    def _move_cost(self, task_id: str, from_idx: int, to_idx: int) -> int:
+        """Change in skill match cost when moving a task between two users (0 if its tags are unknown)"""
+        costs = self.skill_costs.get(task_id)
+        if costs is None:
+            return 0
+        return int(costs[to_idx] - costs[from_idx])
+
+    def _as_assignments(self, changes: Dict[str, Tuple[Optional[int], int]]) -> List[Tuple[str, str, Optional[str]]]:
+        """Convert {task_id: (previous, new) user index} to (task_id, user_id, previous_user_id) tuples"""
+        return [
+            (task_id, self.user_ids[new_idx], None if previous_idx is None else self.user_ids[previous_idx])
+            for task_id, (previous_idx, new_idx) in changes.items()
+        ]
+
+# Shared allocator instance used by the routers
+incremental_allocator = IncrementalAllocator()
@@ -0,0 +1,187 @@
+import os
+import random
+import numpy as np
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from deap import creator
+
+from .stopping import StoppingPolicy
+from .task_optimization import (
+    compute_skill_costs, compute_task_costs, get_toolbox, make_evaluator, run_generations
+)
+
+# Island model for large allocation problems: several sub-populations evolve
+# independently in separate processes and periodically exchange their elites.
+
+def _island_seed(seed: int, island: int, epoch: int) -> int:
+    """Derive a reproducible seed for one island and migration epoch"""
+    return (seed * 1_000_003 + island * 10_007 + epoch) % (2 ** 32)
+
+def _evolve_island(task_costs: np.ndarray, num_users: int, skill_costs: Optional[np.ndarray],
+                   population: np.ndarray, ngen: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Worker entry point - evolve one island for a number of generations.
+
+    Args:
+        task_costs: Per-task costs from compute_task_costs
+        num_users: Number of users tasks can be assigned to
+        skill_costs: Optional (tasks x users) matrix from compute_skill_costs
+        population: (population size x tasks) matrix of user indices
+        ngen: Number of generations to run
+        seed: Seed for this island and epoch
+
+    Returns:
+        Tuple of (evolved population matrix, fitness of each individual)
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+
+    toolbox = get_toolbox(population_size=len(population))
+    evaluate = make_evaluator(task_costs, num_users, skill_costs)
+    individuals = [creator.Individual(row) for row in population.tolist()]
+    run_generations(toolbox, individuals, ngen, evaluate, num_users)
+
+    fitness = np.array([ind.fitness.values[0] for ind in individuals])
+    return np.array(individuals, dtype=np.int32), fitness
+
+def _migrate(populations: List[np.ndarray], fitnesses: List[np.ndarray], migrants: int):
+    """
+    Ring migration: the best individuals of each island replace the worst
+    individuals of the next island.
+    """
+    elites = [
+        (population[np.argsort(fitness)[:migrants]].copy(), np.sort(fitness)[:migrants])
+        for population, fitness in zip(populations, fitnesses)
+    ]
+
+    for island in range(len(populations)):
+        incoming, incoming_fitness = elites[island - 1]
+        worst = np.argsort(fitnesses[island])[::-1][:len(incoming)]
+        populations[island][worst] = incoming
+        fitnesses[island][worst] = incoming_fitness
+
+def evolve_islands(task_costs: np.ndarray, num_users: int,
+                   skill_costs: Optional[np.ndarray] = None, islands: int = 4,
+                   migration_interval: int = 10, migrants: int = 2, ngen: int = 40,
+                   population_size: int = 50, seed: int = 0,
+                   executor: Optional[Executor] = None,
+                   progress: Optional[Callable[[int, int, float], None]] = None,
+                   stopping: Optional[StoppingPolicy] = None) -> List[int]:
+    """
+    Run the allocation genetic algorithm as an island model.
+
+    Results are reproducible for a given seed, independent of how many
+    worker processes are available.
+
+    Args:
+        task_costs: Per-task costs from compute_task_costs
+        num_users: Number of users tasks can be assigned to
+        skill_costs: Optional (tasks x users) matrix from compute_skill_costs
+        islands: Number of sub-populations
+        migration_interval: Generations between migrations
+        migrants: Number of elites sent to the neighbouring island at each migration
+        ngen: Total number of generations
+        population_size: Size of each island's population
+        seed: Base random seed
+        executor: Executor to run the islands on (defaults to a process pool with one worker per island)
+        progress: Optional callback called as progress(generation, ngen, best_cost)
+        stopping: Optional StoppingPolicy, replaces ngen; it is checked after
+            every migration epoch, so runs stop on epoch boundaries
+
+    Returns:
+        List with the index of the assigned user for each task
+    """
+    num_tasks = len(task_costs)
+    if num_tasks == 0 or num_users == 0:
+        return []
+
+    islands = max(1, islands)
+    migration_interval = max(1, migration_interval)
+    migrants = max(0, min(migrants, population_size - 1))
+    if stopping is None:
+        stopping = StoppingPolicy(max_generations=ngen)
+    ngen = stopping.max_generations
+
+    # Random initial populations, one per island
+    rng = np.random.default_rng(seed)
+    populations = [
+        rng.integers(0, num_users, size=(population_size, num_tasks), dtype=np.int32)
+        for _ in range(islands)
+    ]
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=min(islands, os.cpu_count() or 1))
+
+    try:
+        best_individual, best_fitness = None, np.inf
+        generation, epoch = 0, 0
+        tracker = stopping.start(minimize=True)
+
+        while generation < ngen:
+            epoch_generations = min(migration_interval, ngen - generation)
+
+            # Evolve every island in parallel until the next migration
+            futures = [
+                executor.submit(
+                    _evolve_island, task_costs, num_users, skill_costs, populations[island],
+                    epoch_generations, _island_seed(seed, island, epoch)
+                )
+                for island in range(islands)
+            ]
+            results = [future.result() for future in futures]
+            populations = [population for population, _ in results]
+            fitnesses = [fitness for _, fitness in results]
+
+            # Keep track of the best individual found so far
+            for population, fitness in results:
+                idx = int(np.argmin(fitness))
+                if fitness[idx] < best_fitness:
+                    best_individual, best_fitness = population[idx].copy(), float(fitness[idx])
+
+            generation += epoch_generations
+            epoch += 1
+
+            if progress:
+                progress(generation, ngen, best_fitness)
+            if tracker.update(generation, best_fitness):
+                break
+
+            if islands > 1 and migrants and generation < ngen:
+                _migrate(populations, fitnesses, migrants)
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    return best_individual.tolist()
+
+def optimize_task_allocation_islands(tasks: List[Dict], users: List[Dict], islands: int = 4,
+                                     migration_interval: int = 10, seed: int = 0,
+                                     executor: Optional[Executor] = None) -> List[Tuple[str, str]]:
+    """
+    Island-model variant of task_optimization.optimize_task_allocation.
+
+    Args:
+        tasks: List of task dictionaries with id, priority, due_date, etc.
+        users: List of user dictionaries with id, name, etc.
+        islands: Number of sub-populations evolved in parallel
+        migration_interval: Generations between migrations
+        seed: Base random seed
+        executor: Optional executor to run the islands on
+
+    Returns:
+        List of (task_id, user_id) tuples representing the optimal allocation
+    """
+    if not tasks or not users:
+        return []
+
+    best_individual = evolve_islands(
+        compute_task_costs(tasks), len(users), skill_costs=compute_skill_costs(tasks, users), islands=islands,
+        migration_interval=migration_interval, seed=seed, executor=executor
+    )
+
+    return [
+        (tasks[task_idx]['id'], users[user_idx]['id'])
+        for task_idx, user_idx in enumerate(best_individual)
+    ]
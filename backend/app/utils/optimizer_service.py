@@ -0,0 +1,283 @@
+import os
+import uuid
+import asyncio
+import logging
+import functools
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import genetic_algorithm, island_model, task_optimization
+
+logger = logging.getLogger(__name__)
+
+# Optimizer settings
+OPTIMIZER_WORKERS = int(os.getenv("OPTIMIZER_WORKERS", min(2, os.cpu_count() or 1)))
+OPTIMIZER_MAX_JOBS = int(os.getenv("OPTIMIZER_MAX_JOBS", 100))
+
+# Island model runs get a pool of their own, one process per core by default,
+# so a run uses min(islands, ISLAND_WORKERS) cores and doesn't hold up the
+# other optimizations
+ISLAND_WORKERS = int(os.getenv("ISLAND_WORKERS", os.cpu_count() or 1))
+
+# Largest allocation problem an optimizer run loads - 0 (the default) means
+# all unassigned tasks and all active users. The earliest due tasks are
+# kept when the tasks are capped.
+ALLOCATION_MAX_TASKS = int(os.getenv("ALLOCATION_MAX_TASKS", 0))
+ALLOCATION_MAX_USERS = int(os.getenv("ALLOCATION_MAX_USERS", 0))
+
+# Available allocation algorithms
+DEAP_ALGORITHM = "deap"
+GENETIC_ALGORITHM = "genetic"
+ISLAND_ALGORITHM = "island"
+ALGORITHMS = (DEAP_ALGORITHM, GENETIC_ALGORITHM, ISLAND_ALGORITHM)
+
+def _document_id(document: Dict) -> str:
+    """Get the string id of a task or user document"""
+    return str(document.get("id", document.get("_id")))
+
+def serialize_problem(algorithm: str, tasks: List[Dict], users: List[Dict]) -> Dict:
+    """
+    Convert task and user documents into the compact arrays a worker needs.
+
+    Only numpy arrays and plain numbers are sent to the worker process, so
+    pickling cost stays small regardless of how large the documents are.
+
+    Args:
+        algorithm: One of ALGORITHMS
+        tasks: List of task documents
+        users: List of user documents
+
+    Returns:
+        Dictionary of arrays describing the problem
+    """
+    if algorithm in (DEAP_ALGORITHM, ISLAND_ALGORITHM):
+        return {
+            "num_users": len(users),
+            "task_costs": task_optimization.compute_task_costs(tasks),
+            "skill_costs": task_optimization.compute_skill_costs(tasks, users).astype(np.int8),
+        }
+
+    return {
+        "num_users": len(users),
+        "task_scores": genetic_algorithm.TaskAllocationProblem(tasks, users).task_scores,
+    }
+
+def _progress_reporter(job_id: Optional[str], progress_store):
+    """Build a progress callback that records per-generation progress of a job"""
+    def report(generation, generations, best_fitness):
+        if progress_store is not None and job_id is not None:
+            progress_store[job_id] = {
+                "generation": generation,
+                "generations": generations,
+                "best_fitness": float(best_fitness),
+            }
+    return report
+
+def _run_optimization(algorithm: str, problem: Dict, job_id: Optional[str] = None, progress_store=None,
+                      options: Optional[Dict] = None) -> List[int]:
+    """
+    Worker entry point - runs in a separate process.
+
+    Returns:
+        List with the index of the assigned user for each task
+    """
+    report = _progress_reporter(job_id, progress_store)
+    options = options or {}
+    stopping = options.get("stopping")
+
+    if algorithm == DEAP_ALGORITHM:
+        solver = options.get("solver", "ga")
+        task_costs, num_users = problem["task_costs"], problem["num_users"]
+        skill_costs = problem["skill_costs"].astype(np.int64)
+        if solver == "ga":
+            return task_optimization.evolve_allocation(
+                task_costs, num_users, skill_costs=skill_costs, progress=report, stopping=stopping
+            )
+        allocation = task_optimization.SOLVERS[solver](task_costs, num_users, skill_costs=skill_costs)
+        cost = task_optimization.evaluate_population(np.array([allocation]), task_costs, num_users, skill_costs)
+        report(1, 1, cost[0])
+        return allocation
+
+    allocation_problem = genetic_algorithm.TaskAllocationProblem.from_scores(problem["task_scores"], problem["num_users"])
+    return genetic_algorithm.evolve_allocation(allocation_problem, progress=report, stopping=stopping)
+
+class OptimizerService:
+    """
+    Runs CPU-bound allocation algorithms in a bounded process pool so the
+    event loop stays free to serve other requests, and keeps track of
+    background optimization jobs.
+    """
+
+    def __init__(self, max_workers: int = OPTIMIZER_WORKERS, max_jobs: int = OPTIMIZER_MAX_JOBS,
+                 island_workers: int = ISLAND_WORKERS):
+        self.max_workers = max(1, max_workers)
+        self.max_jobs = max_jobs
+        self.island_workers = max(1, island_workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._island_executor: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        self._progress = None
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        # Created lazily so importing the app doesn't spawn worker processes
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    @property
+    def island_executor(self) -> ProcessPoolExecutor:
+        """Pool the islands of island model runs evolve on"""
+        if self._island_executor is None:
+            self._island_executor = ProcessPoolExecutor(max_workers=self.island_workers)
+        return self._island_executor
+
+    @property
+    def progress(self):
+        """Shared dict the workers write per-generation progress into"""
+        if self._progress is None:
+            self._manager = multiprocessing.Manager()
+            self._progress = self._manager.dict()
+        return self._progress
+
+    def shutdown(self):
+        """Stop worker processes - called on application shutdown"""
+        for executor in (self._executor, self._island_executor):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._island_executor = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+            self._progress = None
+
+    async def _execute(self, algorithm: str, tasks: List[Dict], users: List[Dict],
+                       job_id: Optional[str] = None, options: Optional[Dict] = None) -> List[Tuple[str, str]]:
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown optimization algorithm: {algorithm}")
+        if (options or {}).get("solver", "ga") not in task_optimization.SOLVERS:
+            raise ValueError(f"Unknown solver: {options['solver']}")
+        if not tasks or not users:
+            return []
+
+        problem = serialize_problem(algorithm, tasks, users)
+        progress_store = self.progress if job_id is not None else None
+
+        loop = asyncio.get_running_loop()
+        if algorithm == ISLAND_ALGORITHM:
+            # Islands are dispatched to their own process pool from a helper thread
+            best_allocation = await loop.run_in_executor(None, functools.partial(
+                island_model.evolve_islands, problem["task_costs"], problem["num_users"],
+                skill_costs=problem["skill_costs"].astype(np.int64), executor=self.island_executor, progress=_progress_reporter(job_id, progress_store),
+                **(options or {})
+            ))
+        else:
+            best_allocation = await loop.run_in_executor(
+                self.executor, _run_optimization, algorithm, problem, job_id, progress_store, options
+            )
+
+        # Map indices back to document ids
+        return [
+            (_document_id(tasks[task_idx]), _document_id(users[user_idx]))
+            for task_idx, user_idx in enumerate(best_allocation)
+        ]
+
+    async def run(self, algorithm: str, tasks: List[Dict], users: List[Dict],
+                  options: Optional[Dict] = None) -> List[Tuple[str, str]]:
+        """
+        Run an optimization in the process pool and wait for the result.
+
+        Args:
+            algorithm: One of ALGORITHMS
+            tasks: List of task documents
+            users: List of user documents
+            options: Extra settings for the algorithm (solver for "deap", island settings for "island",
+                and a StoppingPolicy under "stopping" for the genetic algorithms)
+
+        Returns:
+            List of (task_id, user_id) tuples representing the optimal allocation
+        """
+        return await self._execute(algorithm, tasks, users, options=options)
+
+    def submit_job(self, algorithm: str, tasks: List[Dict], users: List[Dict],
+                   on_complete: Optional[Callable[[List[Tuple[str, str]]], Awaitable[None]]] = None,
+                   options: Optional[Dict] = None) -> Dict:
+        """
+        Start an optimization in the background.
+
+        Args:
+            algorithm: One of ALGORITHMS
+            tasks: List of task documents
+            users: List of user documents
+            on_complete: Optional coroutine function called with the allocation once it is ready
+            options: Extra settings for the algorithm (solver for "deap", island settings for "island",
+                and a StoppingPolicy under "stopping" for the genetic algorithms)
+
+        Returns:
+            The job record
+        """
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown optimization algorithm: {algorithm}")
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "algorithm": algorithm,
+            "status": "pending",
+            "task_count": len(tasks),
+            "created_at": datetime.utcnow(),
+            "finished_at": None,
+            "allocation": None,
+            "error": None,
+        }
+        self._jobs[job_id] = job
+        self._prune_jobs()
+
+        async def run_job():
+            job["status"] = "running"
+            try:
+                allocation = await self._execute(algorithm, tasks, users, job_id=job_id, options=options)
+                if on_complete:
+                    await on_complete(allocation)
+                job["allocation"] = allocation
+                job["status"] = "completed"
+            except Exception as e:
+                logger.error(f"Optimization job {job_id} failed: {str(e)}", exc_info=True)
+                job["error"] = str(e)
+                job["status"] = "failed"
+            finally:
+                job["finished_at"] = datetime.utcnow()
+
+        job["_task"] = asyncio.create_task(run_job())
+        return self.get_job(job_id)
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Get the current state of a job, including per-generation progress"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+
+        result = {key: value for key, value in job.items() if not key.startswith("_")}
+        result.update({"generation": 0, "generations": None, "best_fitness": None})
+        if self._progress is not None:
+            result.update(self._progress.get(job_id, {}))
+        return result
+
+    def _prune_jobs(self):
+        """Forget the oldest finished jobs once the job history is full"""
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] in ("completed", "failed")]
+        while len(self._jobs) > self.max_jobs and finished:
+            job_id = finished.pop(0)
+            self._jobs.pop(job_id, None)
+            if self._progress is not None:
+                self._progress.pop(job_id, None)
+
+# Shared service instance used by the routers
+optimizer_service = OptimizerService()
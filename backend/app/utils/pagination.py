@@ -0,0 +1,122 @@
+import os
+import json
+import base64
+from typing import Dict, List, Optional, Tuple
+
+from bson import json_util
+from fastapi import HTTPException, Response, status
+
+# Keyset pagination for task lists. Pages are ordered by (due_date, _id), or
+# another ascending sort ending in _id, and the cursor holds the sort key of
+# the last task of a page, so each page is one index range scan however deep
+# the client has paged.
+
+TASK_PAGE_SIZE = int(os.getenv("TASK_PAGE_SIZE", 100))
+TASK_PAGE_SIZE_MAX = int(os.getenv("TASK_PAGE_SIZE_MAX", 1000))
+
+PAGE_SORT = [("due_date", 1), ("_id", 1)]
+
+# Fields every task in a response has; the rest can be left out with fields=
+TASK_REQUIRED_FIELDS = ["title", "due_date", "priority", "status", "created_at", "updated_at", "created_by"]
+TASK_OPTIONAL_FIELDS = ["description", "tags", "assigned_to", "completed_at"]
+
+def encode_cursor(document: Dict, sort: List[Tuple[str, int]] = PAGE_SORT) -> str:
+    """Opaque cursor pointing after a document of a page in the given order"""
+    key = {"sort": [field for field, _ in sort], "after": [document.get(field) for field, _ in sort]}
+    return base64.urlsafe_b64encode(json_util.dumps(key).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort: List[Tuple[str, int]] = PAGE_SORT) -> List:
+    """
+    Decode a cursor into the sort key values it points after.
+
+    Raises:
+        HTTPException: If the cursor wasn't produced by encode_cursor for this order
+    """
+    try:
+        key = json_util.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if key["sort"] != [field for field, _ in sort] or len(key["after"]) != len(sort):
+            raise ValueError("Cursor of another order")
+        return key["after"]
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def after_cursor(query: Dict, cursor: Optional[str], sort: List[Tuple[str, int]] = PAGE_SORT) -> Dict:
+    """Restrict a query to the documents sorted (ascending) after the cursor"""
+    if not cursor:
+        return query
+    values = decode_cursor(cursor, sort)
+
+    # Equal on the first fields and greater on the next one, for each field
+    branches = []
+    for position, (field, _) in enumerate(sort):
+        branch = {prefix: value for (prefix, _), value in zip(sort[:position], values)}
+        # null sorts first, so everything but null is after it
+        branch[field] = {"$ne": None} if values[position] is None else {"$gt": values[position]}
+        branches.append(branch)
+    after = {"$or": branches}
+    return {"$and": [query, after]} if query else after
+
+def task_projection(fields: Optional[str]) -> Optional[Dict]:
+    """
+    Projection keeping the required task fields and the requested optional ones.
+
+    Args:
+        fields: Comma separated optional fields to include, None for all fields
+
+    Raises:
+        HTTPException: If an unknown field is requested
+    """
+    if fields is None:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = sorted(set(requested) - set(TASK_REQUIRED_FIELDS) - set(TASK_OPTIONAL_FIELDS) - {"id"})
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown task fields: {', '.join(unknown)}"
+        )
+    return {field: 1 for field in TASK_REQUIRED_FIELDS + requested if field != "id"}
+
+async def paginate(collection, query: Dict, response: Response, cursor: Optional[str] = None,
+                   limit: int = TASK_PAGE_SIZE, fields: Optional[str] = None,
+                   include_total: bool = False, sort: List[Tuple[str, int]] = PAGE_SORT) -> List[Dict]:
+    """
+    Fetch one page of documents matching a query.
+
+    The cursor of the next page is sent in the X-Next-Cursor header (absent
+    on the last page) and, if include_total is set, the number of documents
+    matching the query in X-Total-Count.
+
+    Args:
+        collection: Collection to read from
+        query: Filter of the listed documents
+        response: Response to set the paging headers on
+        cursor: Cursor from the previous page's X-Next-Cursor header
+        limit: Maximum number of documents in the page
+        fields: Comma separated optional task fields to include (all if None)
+        include_total: Count the documents matching the query
+        sort: Ascending order of the pages, ending in _id so that it's unique
+
+    Returns:
+        The documents of the page
+    """
+    # The sort fields are needed for the next cursor
+    projection = task_projection(fields)
+    if projection is not None:
+        projection.update({field: 1 for field, _ in sort})
+
+    # One extra document tells whether there is a next page
+    documents = await collection.find(after_cursor(query, cursor, sort), projection) \
+        .sort(sort).limit(limit + 1).to_list(length=limit + 1)
+
+    if len(documents) > limit:
+        documents = documents[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(documents[-1], sort)
+
+    if include_total:
+        response.headers["X-Total-Count"] = str(await collection.count_documents(query))
+
+    return documents
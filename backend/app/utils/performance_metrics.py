@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List
+
+# Per-user performance metrics shared by the analytics endpoints and the
+# PowerBI export. The raw per-user figures are computed either in MongoDB
+# (USER_METRICS_GROUP over tasks, USER_ROLLUP_METRICS_PIPELINE over the
+# per-user rollup) or with a pandas groupby over task documents
+# (compute_user_metrics); all are finished the same way by finalize_user_metrics.
+
+TASK_COLUMNS = ["assigned_to", "status", "created_at", "completed_at", "due_date"]
+
+# Statuses counted as completed: the model's (TaskStatus.COMPLETE) and the legacy one
+COMPLETED_STATUSES = ["completed", "complete"]
+
+# Statuses counted as overdue: the legacy one and the one set by the status sweeper
+OVERDUE_STATUSES = ["overdue", "missed"]
+
+_is_complete = {"$in": ["$status", COMPLETED_STATUSES]}
+
+# $group stage computing the raw per-user figures in the database
+USER_METRICS_GROUP = {
+    "_id": "$assigned_to",
+    "tasks_total": {"$sum": 1},
+    "tasks_completed": {"$sum": {"$cond": [_is_complete, 1, 0]}},
+    "tasks_overdue": {"$sum": {"$cond": [{"$in": ["$status", OVERDUE_STATUSES]}, 1, 0]}},
+    "tasks_in_progress": {"$sum": {"$cond": [{"$eq": ["$status", "in_progress"]}, 1, 0]}},
+    "on_time_tasks": {"$sum": {"$cond": [
+        {"$and": [
+            _is_complete,
+            {"$gt": ["$completed_at", None]},
+            {"$gt": ["$due_date", None]},
+            {"$lte": ["$completed_at", "$due_date"]}
+        ]}, 1, 0
+    ]}},
+    # $avg skips the nulls of tasks that don't have a completion time
+    "average_completion_time": {"$avg": {"$cond": [
+        {"$and": [_is_complete, {"$gt": ["$completed_at", None]}, {"$gt": ["$created_at", None]}]},
+        {"$divide": [{"$subtract": ["$completed_at", "$created_at"]}, 3600 * 1000]},
+        None
+    ]}}
+}
+
+_is_complete_row = {"$in": ["$status", COMPLETED_STATUSES]}
+
+def _sum_if(condition: Dict, counter: str) -> Dict:
+    return {"$sum": {"$cond": [condition, f"${counter}", 0]}}
+
+# Pipeline computing the same raw per-user figures from the per-user rollup
+# (daily_stats.user_contributions), one row per user and status
+USER_ROLLUP_METRICS_PIPELINE = [
+    {"$group": {
+        "_id": "$user",
+        "tasks_total": {"$sum": "$tasks"},
+        "tasks_completed": _sum_if(_is_complete_row, "tasks"),
+        "tasks_overdue": _sum_if({"$in": ["$status", OVERDUE_STATUSES]}, "tasks"),
+        "tasks_in_progress": _sum_if({"$eq": ["$status", "in_progress"]}, "tasks"),
+        "on_time_tasks": _sum_if(_is_complete_row, "on_time"),
+        "completion_hours": _sum_if(_is_complete_row, "completion_hours"),
+        "timed_tasks": _sum_if(_is_complete_row, "timed"),
+    }},
+    # Users whose tasks were all moved away or deleted keep rows of zeros
+    {"$match": {"tasks_total": {"$gt": 0}}},
+    {"$set": {"average_completion_time": {"$cond": [
+        {"$gt": ["$timed_tasks", 0]},
+        {"$divide": ["$completion_hours", "$timed_tasks"]},
+        None
+    ]}}}
+]
+
+def compute_user_metrics(tasks: Iterable[Dict]) -> Dict[str, Dict]:
+    """
+    Compute the per-user metrics of a list of task documents in one pass.
+
+    Args:
+        tasks: Task documents with assigned_to, status, created_at, completed_at and due_date
+
+    Returns:
+        Dict mapping user ids to their metrics
+    """
+    df = pd.DataFrame(list(tasks), columns=TASK_COLUMNS)
+    df = df[df["assigned_to"].notna()]
+    if df.empty:
+        return {}
+
+    created_at = pd.to_datetime(df["created_at"], errors="coerce")
+    completed_at = pd.to_datetime(df["completed_at"], errors="coerce")
+    due_date = pd.to_datetime(df["due_date"], errors="coerce")
+    completed = df["status"].isin(COMPLETED_STATUSES)
+
+    # One row per task with its contribution to each figure
+    figures = pd.DataFrame({
+        "user_id": df["assigned_to"].astype(str),
+        "tasks_completed": completed,
+        "tasks_overdue": df["status"].isin(OVERDUE_STATUSES),
+        "tasks_in_progress": df["status"].eq("in_progress"),
+        "on_time_tasks": completed & (completed_at <= due_date),
+        "completion_hours": ((completed_at - created_at).dt.total_seconds() / 3600).where(completed),
+    })
+
+    grouped = figures.groupby("user_id", sort=False).agg(
+        tasks_total=("tasks_completed", "size"),
+        tasks_completed=("tasks_completed", "sum"),
+        tasks_overdue=("tasks_overdue", "sum"),
+        tasks_in_progress=("tasks_in_progress", "sum"),
+        on_time_tasks=("on_time_tasks", "sum"),
+        average_completion_time=("completion_hours", "mean"),
+    )
+    return finalize_user_metrics(grouped.reset_index().to_dict(orient="records"))
+
+def finalize_user_metrics(rows: List[Dict]) -> Dict[str, Dict]:
+    """
+    Derive the rates from the raw per-user figures.
+
+    Args:
+        rows: Raw figures per user, from USER_METRICS_GROUP (keyed by _id) or compute_user_metrics
+
+    Returns:
+        Dict mapping user ids to their metrics
+    """
+    metrics = {}
+    for row in rows:
+        user_id = row.get("user_id", row.get("_id"))
+        if user_id is None:
+            continue
+
+        total, completed = int(row["tasks_total"]), int(row["tasks_completed"])
+        average_completion_time = row.get("average_completion_time")
+        if average_completion_time is not None and np.isnan(average_completion_time):
+            average_completion_time = None
+
+        metrics[str(user_id)] = {
+            "tasks_total": total,
+            "tasks_completed": completed,
+            "tasks_overdue": int(row["tasks_overdue"]),
+            "tasks_in_progress": int(row.get("tasks_in_progress", 0)),
+            "completion_rate": (completed / total * 100) if total > 0 else 0,
+            "on_time_percentage": (int(row["on_time_tasks"]) / completed * 100) if completed > 0 else 0,
+            "average_completion_time": average_completion_time,
+        }
+    return metrics
+
+def user_metric_records(metrics: Dict[str, Dict], users: Iterable[Dict]) -> List[Dict]:
+    """
+    Attach user names to the metrics, in the order of the users.
+
+    Users without any tasks are left out.
+    """
+    records = []
+    for user in users:
+        user_id = str(user["_id"])
+        if user_id not in metrics:
+            continue
+        user_name = user.get("full_name")
+        if not isinstance(user_name, str):
+            user_name = "Unknown"
+        records.append({"user_id": user_id, "user_name": user_name, **metrics[user_id]})
+    return records
@@ -1,7 +1,15 @@
+import io
+import os
+import zipfile
+import numpy as np
 import pandas as pd
 import json
 from fastapi import HTTPException
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from typing import AsyncIterable, AsyncIterator, Dict, List, Optional
+
+from .performance_metrics import OVERDUE_STATUSES, compute_user_metrics, user_metric_records
+from .heatmaps import day_labels, heatmap_matrix, heatmap_rows
 
 def prepare_data_for_powerbi(tasks, users):
     """
@@ -24,13 +32,16 @@ def prepare_data_for_powerbi(tasks, users):
         if not users_df.empty and '_id' in users_df.columns and 'full_name' in users_df.columns:
             user_map = users_df.set_index('_id')['full_name'].to_dict()
         
-        # Add user names to tasks if not already present
-        if not tasks_df.empty:
-            if 'created_by' in tasks_df.columns and 'created_by_name' not in tasks_df.columns:
-                tasks_df['created_by_name'] = tasks_df['created_by'].map(user_map).fillna('Unknown')
-                
-            if 'assigned_to' in tasks_df.columns and 'assigned_to_name' not in tasks_df.columns:
-                tasks_df['assigned_to_name'] = tasks_df['assigned_to'].map(user_map).fillna('Unassigned')
+        # Add user names to tasks if not already present - mapped per column and
+        # attached to copies of the documents, which is much cheaper than
+        # converting the whole DataFrame back to records
+        task_records = [dict(task) for task in tasks]
+        for id_column, name_column, default in (('created_by', 'created_by_name', 'Unknown'),
+                                                ('assigned_to', 'assigned_to_name', 'Unassigned')):
+            if id_column in tasks_df.columns and name_column not in tasks_df.columns:
+                names = tasks_df[id_column].map(user_map).fillna(default)
+                for record, name in zip(task_records, names):
+                    record[name_column] = name
         
         # Generate summary data frames
         
@@ -49,41 +60,54 @@ def prepare_data_for_powerbi(tasks, users):
             priority_summary = pd.DataFrame(columns=['priority', 'count'])
         
         # 3. User performance summary
-        user_performance = []
-        
-        if not tasks_df.empty and 'assigned_to' in tasks_df.columns:
-            for user_id, user_name in user_map.items():
-                user_tasks = tasks_df[tasks_df['assigned_to'] == user_id]
-                
-                if len(user_tasks) == 0:
-                    continue
-                
-                completed = len(user_tasks[user_tasks['status'] == 'complete'])
-                overdue = len(user_tasks[user_tasks['status'] == 'overdue'])
-                total = len(user_tasks)
-                
-                user_performance.append({
-                    'user_id': user_id,
-                    'user_name': user_name,
-                    'tasks_completed': completed,
-                    'tasks_overdue': overdue,
-                    'tasks_total': total,
-                    'completion_rate': (completed / total * 100) if total > 0 else 0
-                })
-        
-        user_performance_df = pd.DataFrame(user_performance)
+        user_performance = user_metric_records(compute_user_metrics(tasks), users)
         
         return {
-            'tasks': tasks_df.to_dict(orient='records') if not tasks_df.empty else [],
+            'tasks': task_records,
             'users': users_df.to_dict(orient='records') if not users_df.empty else [],
             'status_summary': status_summary.to_dict(orient='records'),
             'priority_summary': priority_summary.to_dict(orient='records'),
-            'user_performance': user_performance_df.to_dict(orient='records') if not user_performance_df.empty else []
+            'user_performance': user_performance
         }
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to prepare data for PowerBI: {str(e)}")
 
+def _daily_counts(tasks_df, column, day_index):
+    """
+    Number of tasks per day of a datetime column, for each day of day_index.
+    
+    Timestamps are floored to their (UTC) day and counted in one pass.
+    """
+    if column not in tasks_df.columns:
+        return np.zeros(len(day_index), dtype=np.int64)
+    
+    timestamps = pd.to_datetime(tasks_df[column], errors='coerce', utc=True).dt.tz_localize(None)
+    counts = timestamps.dt.floor('D').value_counts()
+    return counts.reindex(day_index, fill_value=0).to_numpy()
+
+def build_time_series(tasks_df, days):
+    """
+    Daily created, completed and due task counts over the last `days` days.
+    
+    Returns:
+        DataFrame with one row per day (empty if there are no tasks)
+    """
+    columns = ['date', 'tasks_created', 'tasks_completed', 'tasks_due']
+    if tasks_df.empty or 'created_at' not in tasks_df.columns:
+        return pd.DataFrame({column: pd.Series(dtype='datetime64[ns]' if column == 'date' else 'int64')
+                             for column in columns})
+    
+    # Count each metric once over the whole column, then align to the date range
+    start_date = datetime.utcnow() - timedelta(days=days)
+    day_index = pd.date_range(pd.Timestamp(start_date).floor('D'), periods=days, freq='D')
+    return pd.DataFrame({
+        'date': day_index,
+        'tasks_created': _daily_counts(tasks_df, 'created_at', day_index),
+        'tasks_completed': _daily_counts(tasks_df, 'completed_at', day_index),
+        'tasks_due': _daily_counts(tasks_df, 'due_date', day_index)
+    })
+
 def generate_powerbi_export(tasks, users, days=30):
     """
     Generate data in the format expected by PowerBI.
@@ -100,50 +124,24 @@ def generate_powerbi_export(tasks, users, days=30):
         data = prepare_data_for_powerbi(tasks, users)
         
         # Add time-series data for trending
-        time_series = []
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days)
-        
-        tasks_df = pd.DataFrame(tasks)
+        time_series = build_time_series(pd.DataFrame(tasks), days)
+        time_series['date'] = time_series['date'].dt.strftime('%Y-%m-%d')
+        data['time_series'] = time_series.to_dict(orient='records')
         
-        if not tasks_df.empty and 'created_at' in tasks_df.columns:
-            # Convert datetime columns to pandas datetime if they aren't already
-            for col in ['created_at', 'due_date', 'completed_at']:
-                if col in tasks_df.columns:
-                    if tasks_df[col].dtype != 'datetime64[ns]':
-                        tasks_df[col] = pd.to_datetime(tasks_df[col], errors='coerce')
-        
-            # Generate daily metrics
-            for i in range(days):
-                day = start_date + timedelta(days=i)
-                day_end = day + timedelta(days=1)
-                
-                # Filter tasks for this day
-                created = len(tasks_df[(tasks_df['created_at'] >= day) & (tasks_df['created_at'] < day_end)])
-                completed = len(tasks_df[(tasks_df['completed_at'] >= day) & (tasks_df['completed_at'] < day_end)])
-                due = len(tasks_df[(tasks_df['due_date'] >= day) & (tasks_df['due_date'] < day_end)])
-                
-                time_series.append({
-                    'date': day.strftime('%Y-%m-%d'),
-                    'tasks_created': created,
-                    'tasks_completed': completed,
-                    'tasks_due': due
-                })
-        
-        data['time_series'] = time_series
-        
-        return json.dumps(data)
+        return json.dumps(data, default=str)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate PowerBI export: {str(e)}")
 
-def generate_heatmap_data(tasks, users):
+def generate_heatmap_data(tasks, users, as_matrix=False):
     """
     Generate data specifically for user missed task heatmaps in PowerBI.
     
     Args:
         tasks: List of task documents
         users: List of user documents
+        as_matrix: Return one dense users x days matrix with its labels
+            instead of a record per (user, day) cell
     
     Returns:
         Dictionary with heatmap data
@@ -151,43 +149,224 @@ def generate_heatmap_data(tasks, users):
     try:
         # Convert to pandas DataFrames
         tasks_df = pd.DataFrame(tasks)
-        users_df = pd.DataFrame(users)
         
-        heatmap_data = []
+        empty = {'user_ids': [], 'user_names': [], 'dates': [], 'missed_counts': []} if as_matrix else []
         
         # Skip if no tasks or missing data
         if tasks_df.empty or 'due_date' not in tasks_df.columns or 'assigned_to' not in tasks_df.columns:
-            return {'heatmap_data': heatmap_data}
+            return {'heatmap_data': empty}
         
         # Create a user lookup dictionary
-        user_map = {}
-        if not users_df.empty and '_id' in users_df.columns and 'full_name' in users_df.columns:
-            user_map = users_df.set_index('_id')['full_name'].to_dict()
+        user_map = {str(user['_id']): user.get('full_name') or 'Unknown' for user in users if '_id' in user}
+        
+        # Filter to only include overdue tasks with a due date
+        due_day = pd.to_datetime(tasks_df['due_date'], errors='coerce').dt.floor('D')
+        overdue = tasks_df['status'].isin(OVERDUE_STATUSES) & due_day.notna() & tasks_df['assigned_to'].notna()
+        if not overdue.any():
+            return {'heatmap_data': empty}
+        
+        user_ids = tasks_df.loc[overdue, 'assigned_to'].astype(str)
+        due_day = due_day[overdue]
         
-        # Convert due_date to datetime if not already
-        if tasks_df['due_date'].dtype != 'datetime64[ns]':
-            tasks_df['due_date'] = pd.to_datetime(tasks_df['due_date'], errors='coerce')
-        
-        # Filter to only include overdue tasks
-        overdue_tasks = tasks_df[tasks_df['status'] == 'overdue']
-        
-        # Group by user and date
-        if not overdue_tasks.empty:
-            overdue_tasks['due_date_day'] = overdue_tasks['due_date'].dt.date
-            
-            # Group and count
-            grouped = overdue_tasks.groupby(['assigned_to', 'due_date_day']).size().reset_index()
-            grouped.columns = ['user_id', 'date', 'missed_count']
-            
-            # Add user names
-            grouped['user_name'] = grouped['user_id'].map(user_map).fillna('Unknown')
-            
-            # Convert date to string format YYYY-MM-DD
-            grouped['date'] = grouped['date'].astype(str)
-            
-            heatmap_data = grouped.to_dict(orient='records')
+        # Dense users x days matrix in one pass
+        row_labels = sorted(user_ids.unique())
+        column_labels = pd.date_range(due_day.min(), due_day.max(), freq='D')
+        missed_counts = heatmap_matrix(row_labels, column_labels, user_ids, due_day)
+        dates = day_labels(column_labels)
+        user_names = [user_map.get(user_id, 'Unknown') for user_id in row_labels]
         
+        if as_matrix:
+            return {'heatmap_data': {
+                'user_ids': row_labels,
+                'user_names': user_names,
+                'dates': dates,
+                'missed_counts': missed_counts.tolist()
+            }}
+        
+        # One record per non-empty cell
+        heatmap_data = [
+            {'user_id': user_id, 'date': date_label, 'missed_count': missed_count, 'user_name': user_name}
+            for user_id, user_name, missed_by_day in zip(row_labels, user_names, heatmap_rows(missed_counts, dates))
+            for date_label, missed_count in missed_by_day.items()
+        ]
         return {'heatmap_data': heatmap_data}
     
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to generate heatmap data: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to generate heatmap data: {str(e)}") 
+
+def _json_default(value):
+    """JSON encoding of the non-JSON values in task documents (dates, ObjectIds, enums)"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(getattr(value, 'value', value))
+
+def powerbi_task_row(task: Dict, user_map: Dict[str, str]) -> Dict:
+    """
+    Flatten a task document into an export row with the user names joined in.
+    
+    Args:
+        task: Task document
+        user_map: User ids to full names
+    
+    Returns:
+        The export row
+    """
+    row = dict(task)
+    row['_id'] = str(row['_id'])
+    for id_column, name_column in (('created_by', 'created_by_name'), ('assigned_to', 'assigned_to_name')):
+        user_id = row.get(id_column)
+        if user_id is not None:
+            row[id_column] = str(user_id)
+            if row[id_column] in user_map:
+                row[name_column] = user_map[row[id_column]]
+    return row
+
+async def stream_powerbi_rows(tasks: AsyncIterable[Dict], user_map: Dict[str, str],
+                              json_array: bool = False, batch_size: int = 1000) -> AsyncIterator[str]:
+    """
+    Encode task documents as they are read, for a streaming response.
+    
+    Rows are emitted as NDJSON (one JSON object per line) or, with
+    json_array, as the elements of a single JSON array. Output is produced
+    in batches of rows so memory use doesn't grow with the number of tasks.
+    
+    Args:
+        tasks: Async iterable of task documents, typically a Motor cursor
+        user_map: User ids to full names
+        json_array: Emit a JSON array instead of NDJSON
+        batch_size: Number of rows per emitted chunk
+    
+    Yields:
+        Chunks of encoded rows
+    """
+    def encode(rows, first):
+        if json_array:
+            return ('' if first else ',') + ','.join(rows)
+        return ''.join(row + '\n' for row in rows)
+    
+    if json_array:
+        yield '['
+    
+    batch, first = [], True
+    async for task in tasks:
+        batch.append(json.dumps(powerbi_task_row(task, user_map), default=_json_default))
+        if len(batch) >= batch_size:
+            yield encode(batch, first)
+            batch, first = [], False
+    
+    if batch:
+        yield encode(batch, first)
+    if json_array:
+        yield ']'
+
+# Columnar export settings
+POWERBI_EXPORT_DIR = os.getenv("POWERBI_EXPORT_DIR", "exports/powerbi")
+DATETIME_COLUMNS = ['created_at', 'updated_at', 'due_date', 'completed_at']
+CATEGORY_COLUMNS = ['status', 'priority', 'created_by', 'created_by_name', 'assigned_to', 'assigned_to_name', 'company']
+ID_COLUMNS = ['_id', 'created_by', 'assigned_to']
+
+def _require_pyarrow():
+    """Import pyarrow on first use - it is only needed for columnar exports"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise HTTPException(status_code=500, detail="Parquet export requires the pyarrow package")
+    return pyarrow
+
+def _typed_frame(records: List[Dict]) -> pd.DataFrame:
+    """Build a DataFrame with string ids, datetime and category columns"""
+    df = pd.DataFrame(records)
+    for column in ID_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].map(lambda value: None if value is None else str(getattr(value, 'value', value)))
+    for column in DATETIME_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column], errors='coerce', utc=True).dt.tz_localize(None)
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].map(lambda value: getattr(value, 'value', value)).astype('category')
+    return df
+
+def build_export_tables(tasks: List[Dict], users: List[Dict], days: int = 30,
+                        incremental: bool = False,
+                        deleted_task_ids: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Build the typed tables of a columnar PowerBI export.
+    
+    Args:
+        tasks: List of task documents
+        users: List of user documents
+        days: Number of days to include in time-series data
+        incremental: Only export tasks and users - summaries of a partial set
+            of tasks would be misleading
+        deleted_task_ids: Ids of the tasks deleted since the previous export,
+            exported as a table of their own in incremental exports
+    
+    Returns:
+        Dictionary of table name to DataFrame
+    """
+    # Tasks reference users by string id
+    users = [
+        {**{key: value for key, value in user.items() if key != 'hashed_password'}, '_id': str(user['_id'])}
+        for user in users
+    ]
+    data = prepare_data_for_powerbi(tasks, users)
+    
+    tables = {
+        'tasks': _typed_frame(data['tasks']),
+        'users': _typed_frame(data['users']),
+    }
+    if incremental:
+        tables['deleted_task_ids'] = pd.DataFrame({'task_id': pd.Series(deleted_task_ids or [], dtype='string')})
+    else:
+        tables['status_summary'] = pd.DataFrame(data['status_summary'], columns=['status', 'count'])
+        tables['priority_summary'] = pd.DataFrame(data['priority_summary'], columns=['priority', 'count'])
+        tables['user_performance'] = pd.DataFrame(data['user_performance'])
+        tables['time_series'] = build_time_series(tables['tasks'], days)
+    return tables
+
+def _write_parquet(df: pd.DataFrame, destination):
+    pyarrow = _require_pyarrow()
+    table = pyarrow.Table.from_pandas(df, preserve_index=False)
+    pyarrow.parquet.write_table(table, destination, compression='snappy')
+
+def write_parquet_export(tables: Dict[str, pd.DataFrame], directory: str = POWERBI_EXPORT_DIR,
+                         suffix: Optional[str] = None) -> List[str]:
+    """
+    Write each table to a Parquet file in a local directory.
+    
+    Args:
+        tables: Tables from build_export_tables
+        directory: Directory to write to (created if missing)
+        suffix: Optional suffix for the file names, e.g. the watermark of an incremental export
+    
+    Returns:
+        Paths of the written files
+    """
+    _require_pyarrow()
+    os.makedirs(directory, exist_ok=True)
+    
+    paths = []
+    for name, df in tables.items():
+        path = os.path.join(directory, f"{name}_{suffix}.parquet" if suffix else f"{name}.parquet")
+        _write_parquet(df, path)
+        paths.append(path)
+    return paths
+
+def parquet_archive(tables: Dict[str, pd.DataFrame]) -> bytes:
+    """
+    Pack each table as a Parquet file into a zip archive for download.
+    
+    Returns:
+        The zip archive
+    """
+    _require_pyarrow()
+    buffer = io.BytesIO()
+    # Parquet is already compressed, so the archive only stores the files
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for name, df in tables.items():
+            file_buffer = io.BytesIO()
+            _write_parquet(df, file_buffer)
+            archive.writestr(f"{name}.parquet", file_buffer.getvalue())
+    return buffer.getvalue()
@@ -0,0 +1,98 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+# Cache settings
+ANALYTICS_CACHE_TTL = float(os.getenv("ANALYTICS_CACHE_TTL", 30))
+ANALYTICS_CACHE_SIZE = int(os.getenv("ANALYTICS_CACHE_SIZE", 256))
+
+class AsyncTTLCache:
+    """
+    In-memory cache for the results of async computations.
+
+    Entries expire after ttl seconds and the least recently used entry is
+    evicted once maxsize entries are stored. Concurrent requests for a key
+    that is being computed wait for that computation instead of starting
+    their own (single flight). If the request computing a value is
+    cancelled, one of the waiters computes it instead.
+    """
+
+    def __init__(self, ttl: float = ANALYTICS_CACHE_TTL, maxsize: int = ANALYTICS_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Get the cached value of a key, computing it if it's missing or expired.
+
+        Args:
+            key: Hashable cache key
+            compute: Coroutine function producing the value
+
+        Returns:
+            The cached or freshly computed value
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        # Someone is already computing this key - share their result
+        pending = self._pending.get(key)
+        while pending is not None:
+            # wait() only raises if this request is cancelled, and leaves the shared future alone
+            await asyncio.wait([pending])
+            if not pending.cancelled():
+                self.hits += 1
+                return pending.result()
+            # The request computing the value was cancelled - the first waiter takes over
+            pending = self._pending.get(key)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        generation = self._generation
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            # Wakes the waiters, which retry instead of failing with this request
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Waiters get the error, don't log it as unretrieved
+            raise
+        finally:
+            self._pending.pop(key, None)
+
+        # Results computed across an invalidation may be stale and aren't stored
+        if generation == self._generation:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        future.set_result(value)
+        return value
+
+    def invalidate(self):
+        """Drop all cached values, e.g. after the underlying data changed"""
+        self._entries.clear()
+        self._generation += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+# Shared cache for analytics responses
+analytics_cache = AsyncTTLCache()
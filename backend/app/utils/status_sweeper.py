@@ -0,0 +1,172 @@
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from ..config.database import tasks_collection
+from pymongo import ReturnDocument
+
+from ..models.task import TaskStatus
+from .bulk_writes import apply_assignments, merge_assignments
+from .daily_stats import record_task_changes
+from .incremental_allocation import incremental_allocator
+from .task_ranking import ranked_update, sort_rank
+
+logger = logging.getLogger(__name__)
+
+# Sweeper settings - an interval of 0 disables the sweeper
+STATUS_SWEEP_INTERVAL = float(os.getenv("STATUS_SWEEP_INTERVAL", 60))
+STATUS_SWEEP_BATCH_SIZE = int(os.getenv("STATUS_SWEEP_BATCH_SIZE", 1000))
+
+# Statuses of tasks that are still to be done (both the model's and legacy names)
+OPEN_STATUSES = [TaskStatus.PENDING.value, TaskStatus.IN_PROGRESS.value, "todo"]
+
+def overdue_query(now: datetime) -> Dict:
+    """Query for the open tasks that are past their due date (served by the status+due_date index)"""
+    return {"status": {"$in": OPEN_STATUSES}, "due_date": {"$lt": now}}
+
+class StatusSweeper:
+    """
+    Background task persisting the missed status of overdue tasks.
+
+    Every interval seconds the open tasks past their due date are flipped
+    to missed, and the transitions are recorded in the daily rollup and the
+    incremental allocator, so reads and analytics see the status as stored.
+    Each task is flipped with a conditional update returning the version it
+    replaced, so a task completed in the meantime or already flipped by
+    another worker is neither changed nor recorded twice.
+    """
+
+    def __init__(self, collection=tasks_collection, interval: float = STATUS_SWEEP_INTERVAL,
+                 batch_size: int = STATUS_SWEEP_BATCH_SIZE):
+        self.collection = collection
+        self.interval = interval
+        self.batch_size = max(1, batch_size)
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics of the runs
+        self.runs = 0
+        self.total_swept = 0
+        self.last_swept = 0
+        self.last_success_at: Optional[datetime] = None
+        self.last_run_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    async def sweep(self, now: Optional[datetime] = None) -> int:
+        """
+        Flip the open tasks due before now to missed.
+
+        Args:
+            now: Cut-off for the due dates, defaults to the current time
+
+        Returns:
+            Number of tasks marked missed
+        """
+        now = now or datetime.utcnow()
+        swept = 0
+
+        while True:
+            tasks = await self.collection.find(overdue_query(now)).limit(self.batch_size).to_list(length=self.batch_size)
+            if not tasks:
+                break
+
+            # updated_at is stamped per batch, not at the start of a long sweep, so the
+            # flips aren't older than change feed watermarks handed out meanwhile
+            update = {"status": TaskStatus.MISSED.value, "updated_at": datetime.utcnow()}
+
+            # The query is repeated so tasks completed in the meantime are left alone
+            previous = await asyncio.gather(*[
+                self.collection.find_one_and_update(
+                    {"_id": task["_id"], **overdue_query(now)},
+                    ranked_update(update),
+                    return_document=ReturnDocument.BEFORE
+                )
+                for task in tasks
+            ])
+
+            # Only the tasks this run flipped are recorded
+            changes = []
+            for old_task in previous:
+                if old_task is None:
+                    continue
+                missed = {**old_task, **update}
+                missed["sort_rank"] = sort_rank(missed)
+                changes.append((old_task, missed))
+            await record_task_changes(changes)
+            await self._release([str(old_task["_id"]) for old_task, _ in changes])
+
+            swept += len(changes)
+            if len(tasks) < self.batch_size or not changes:
+                break
+
+        return swept
+
+    async def _release(self, task_ids: List[str]):
+        """Drop missed tasks from the incremental allocation and write its repairs"""
+        changes = merge_assignments(*(incremental_allocator.remove_task(task_id) for task_id in task_ids))
+        if changes:
+            await apply_assignments(self.collection, changes)
+
+    async def run_once(self):
+        """Sweep once, recording the run in the metrics instead of raising"""
+        started_at = datetime.utcnow()
+        started = time.monotonic()
+        try:
+            self.last_swept = await self.sweep(started_at)
+            self.total_swept += self.last_swept
+            self.last_success_at = started_at
+            self.last_error = None
+            if self.last_swept:
+                logger.info(f"Marked {self.last_swept} overdue tasks as missed")
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Error sweeping overdue tasks: {str(e)}", exc_info=True)
+        finally:
+            self.runs += 1
+            self.last_run_duration = time.monotonic() - started
+
+    async def _run_forever(self):
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start sweeping in the background (no-op if disabled or already running)"""
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run_forever())
+
+    async def stop(self):
+        """Stop the background sweeps"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def metrics(self, now: Optional[datetime] = None) -> Dict:
+        """
+        Report the state of the sweeper.
+
+        lag_seconds is the time since the last successful sweep started,
+        i.e. how long a task can have been overdue without being marked missed.
+        """
+        now = now or datetime.utcnow()
+        return {
+            "running": self._task is not None,
+            "interval_seconds": self.interval,
+            "runs": self.runs,
+            "last_success_at": self.last_success_at,
+            "lag_seconds": (now - self.last_success_at).total_seconds() if self.last_success_at else None,
+            "last_run_duration_seconds": self.last_run_duration,
+            "last_swept": self.last_swept,
+            "total_swept": self.total_swept,
+            "last_error": self.last_error,
+        }
+
+# Shared sweeper started with the app
+status_sweeper = StatusSweeper()
@@ -0,0 +1,95 @@
+import time
+from typing import Optional
+
+# Stopping policies for the allocation genetic algorithms
+
+class StoppingPolicy:
+    """
+    When an evolutionary run should stop.
+
+    A run stops as soon as any configured criterion is met:
+    - max_generations generations have run
+    - the best fitness hasn't improved for `patience` generations
+    - `time_budget` seconds have passed since the run started
+    - the best fitness reached `target_fitness`
+    """
+
+    def __init__(self, max_generations: int = 40, patience: Optional[int] = None,
+                 time_budget: Optional[float] = None, target_fitness: Optional[float] = None):
+        self.max_generations = max_generations
+        self.patience = patience
+        self.time_budget = time_budget
+        self.target_fitness = target_fitness
+
+    def replace(self, **changes) -> "StoppingPolicy":
+        """Copy of the policy with some settings changed (None values are ignored)"""
+        settings = dict(vars(self))
+        settings.update({key: value for key, value in changes.items() if value is not None})
+        return StoppingPolicy(**settings)
+
+    def start(self, minimize: bool = True) -> "StoppingTracker":
+        """Start tracking a run - call right before the first generation"""
+        return StoppingTracker(self, minimize)
+
+    def __repr__(self):
+        settings = ", ".join(f"{key}={value}" for key, value in vars(self).items() if value is not None)
+        return f"StoppingPolicy({settings})"
+
+class StoppingTracker:
+    """Tracks the progress of one run against a StoppingPolicy"""
+
+    def __init__(self, policy: StoppingPolicy, minimize: bool = True):
+        self.policy = policy
+        self.minimize = minimize
+        self.started_at = time.perf_counter()
+        self.best_fitness: Optional[float] = None
+        self.best_generation = 0
+        self.reason: Optional[str] = None
+
+    def _improves(self, fitness: float) -> bool:
+        if self.best_fitness is None:
+            return True
+        return fitness < self.best_fitness if self.minimize else fitness > self.best_fitness
+
+    def _reached_target(self) -> bool:
+        target = self.policy.target_fitness
+        if target is None or self.best_fitness is None:
+            return False
+        return self.best_fitness <= target if self.minimize else self.best_fitness >= target
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the run started"""
+        return time.perf_counter() - self.started_at
+
+    def update(self, generation: int, best_fitness: float) -> bool:
+        """
+        Record the best fitness after a generation.
+
+        Returns:
+            True if the run should stop
+        """
+        if self._improves(best_fitness):
+            self.best_fitness = best_fitness
+            self.best_generation = generation
+
+        policy = self.policy
+        if self._reached_target():
+            self.reason = "target_fitness"
+        elif policy.time_budget is not None and self.elapsed >= policy.time_budget:
+            self.reason = "time_budget"
+        elif policy.patience is not None and generation - self.best_generation >= policy.patience:
+            self.reason = "no_improvement"
+        elif generation >= policy.max_generations:
+            self.reason = "max_generations"
+
+        return self.reason is not None
+
+# Interactive HTTP calls need predictable latency, nightly batch runs can use more time
+INTERACTIVE_POLICY = StoppingPolicy(max_generations=200, patience=15, time_budget=0.2)
+BATCH_POLICY = StoppingPolicy(max_generations=5000, patience=200, time_budget=30.0)
+
+STOPPING_POLICIES = {
+    "interactive": INTERACTIVE_POLICY,
+    "batch": BATCH_POLICY,
+}
@@ -1,105 +1,384 @@
 import random
+import threading
 import numpy as np
-from deap import base, creator, tools, algorithms
+from collections import OrderedDict
+from deap import base, creator, tools
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple
+from typing import Callable, List, Dict, Optional, Tuple
+from .assignment_solvers import solve_greedy, solve_min_cost_flow
+from .stopping import StoppingPolicy, StoppingTracker
+from .task_ranking import sort_rank
 
 # Define the genetic algorithm for task allocation
 
-def optimize_task_allocation(tasks: List[Dict], users: List[Dict]) -> List[Tuple[str, str]]:
+# Numeric priority levels used by the allocation cost model
+PRIORITY_MAP = {
+    'low': 1,
+    'medium': 2,
+    'high': 3,
+    'critical': 4
+}
+
+def compute_task_costs(tasks: List[Dict], now: datetime = None) -> np.ndarray:
     """
-    Uses a genetic algorithm to optimize task allocation to users.
+    Precompute the user-independent part of each task's allocation cost.
+    
+    Priority and due date costs only depend on the task, so they are
+    calculated once per optimization run instead of once per evaluation.
     
     Args:
-        tasks: List of task dictionaries with id, priority, due_date, etc.
-        users: List of user dictionaries with id, name, etc.
+        tasks: List of task dictionaries with priority and due_date
+        now: Reference time for due date costs (defaults to datetime.now())
     
     Returns:
-        List of (task_id, user_id) tuples representing the optimal allocation
+        Integer array with one combined priority/due date cost per task
     """
-    if not tasks or not users:
-        return []
+    if now is None:
+        now = datetime.now()
+    
+    # Factor 1: Priority cost - higher priority tasks should be prioritized
+    priority_cost = np.array(
+        [5 - PRIORITY_MAP.get(task['priority'], 1) for task in tasks],  # Inverse of priority
+        dtype=np.int64
+    )
+    
+    # Factor 2: Due date cost - sooner due dates should be prioritized (capped at 10 days)
+    due_date_cost = np.array(
+        [min(max(0, (task['due_date'] - now).days), 10) for task in tasks],
+        dtype=np.int64
+    )
+    
+    return (priority_cost * 3) + (due_date_cost * 2)
+
+def compute_skill_costs(tasks: List[Dict], users: List[Dict]) -> np.ndarray:
+    """
+    Precompute how badly each user's skills match each task's tags.
+    
+    A task with no tags fits everyone (cost 0). Otherwise the cost goes from
+    0 when the user has every tag of the task to 5 when they have none.
+    
+    Args:
+        tasks: List of task dictionaries with tags
+        users: List of user dictionaries with skills
+    
+    Returns:
+        (tasks x users) integer matrix of skill match costs
+    """
+    task_tags = [{str(tag).lower() for tag in task.get('tags') or []} for task in tasks]
+    user_skills = [{str(skill).lower() for skill in user.get('skills') or []} for user in users]
+    
+    vocabulary = {tag: idx for idx, tag in enumerate(set().union(*task_tags))}
+    if not vocabulary:
+        return np.zeros((len(tasks), len(users)), dtype=np.int64)
+    
+    # Binary task x tag and user x tag matrices
+    task_matrix = np.zeros((len(tasks), len(vocabulary)), dtype=np.int64)
+    for i, tags in enumerate(task_tags):
+        task_matrix[i, [vocabulary[tag] for tag in tags]] = 1
+    user_matrix = np.zeros((len(users), len(vocabulary)), dtype=np.int64)
+    for j, skills in enumerate(user_skills):
+        user_matrix[j, [vocabulary[skill] for skill in skills if skill in vocabulary]] = 1
+    
+    matches = task_matrix @ user_matrix.T
+    tag_counts = np.maximum(task_matrix.sum(axis=1, keepdims=True), 1)
+    costs = 5 - (5 * matches) // tag_counts
+    costs[task_matrix.sum(axis=1) == 0] = 0
+    return costs
+
+def evaluate_population(population: np.ndarray, task_costs: np.ndarray, num_users: int,
+                        skill_costs: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Score a whole population of allocations at once.
+    
+    Args:
+        population: (population size x tasks) integer matrix of user indices
+        task_costs: Per-task costs from compute_task_costs
+        num_users: Number of users tasks can be assigned to
+        skill_costs: Optional (tasks x users) matrix from compute_skill_costs
     
-    # Create fitness and individual classes
+    Returns:
+        Array with the total cost of each individual (lower is better)
+    """
+    population = np.asarray(population, dtype=np.int64)
+    
+    # Combine costs with weights
+    total_cost = np.full(population.shape[0], task_costs.sum(), dtype=np.float64)
+    
+    # Factor 3: User skill match cost
+    if skill_costs is not None:
+        total_cost += skill_costs[np.arange(population.shape[1]), population].sum(axis=1)
+    
+    # Factor 4: Workload balance penalty
+    if num_users > 1:
+        # Offset each row so a single bincount yields the workload of every user per individual
+        offsets = np.arange(population.shape[0])[:, None] * num_users
+        workloads = np.bincount(
+            (population + offsets).ravel(),
+            minlength=population.shape[0] * num_users
+        ).reshape(population.shape[0], num_users)
+        workload_std = workloads.std(axis=1)
+        total_cost += workload_std * 10  # Penalize uneven distribution
+    
+    return total_cost
+
+class FitnessMemo:
+    """
+    LRU cache of individual costs, keyed by a hash of the individual's genes.
+    
+    Fitness is deterministic, so individuals that reappear after crossover
+    and mutation don't need to be evaluated again.
+    """
+    
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._costs = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: int) -> Optional[float]:
+        cost = self._costs.get(key)
+        if cost is None:
+            self.misses += 1
+            return None
+        self._costs.move_to_end(key)
+        self.hits += 1
+        return cost
+    
+    def put(self, key: int, cost: float):
+        self._costs[key] = cost
+        self._costs.move_to_end(key)
+        if len(self._costs) > self.maxsize:
+            self._costs.popitem(last=False)
+
+# Create fitness and individual classes once per process
+if not hasattr(creator, "FitnessMin"):
     creator.create("FitnessMin", base.Fitness, weights=(-1.0,))
+if not hasattr(creator, "Individual"):
     creator.create("Individual", list, fitness=creator.FitnessMin)
+
+def _random_population(num_tasks: int, num_users: int, n: int) -> List:
+    """Generate n random allocations - for each task, assign a random user"""
+    return [
+        creator.Individual(random.randint(0, num_users - 1) for _ in range(num_tasks))
+        for _ in range(n)
+    ]
+
+def _clone_individual(individual):
+    """Shallow copy of an individual - genes are plain ints, so deepcopy is not needed"""
+    clone = creator.Individual(individual)
+    if individual.fitness.valid:
+        clone.fitness.values = individual.fitness.values
+    return clone
+
+# Toolboxes only depend on the operator configuration, so they are built once and shared
+_toolbox_cache: Dict[Tuple, base.Toolbox] = {}
+_toolbox_lock = threading.Lock()
+
+def get_toolbox(population_size: int = 50, indpb: float = 0.2, tournsize: int = 3) -> base.Toolbox:
+    """
+    Get the DEAP toolbox for an operator configuration, building it on first use.
     
-    toolbox = base.Toolbox()
+    The toolbox holds no per-problem state: the number of tasks and users is
+    passed to toolbox.population and toolbox.mutate on each call, and fitness
+    is evaluated by the function from make_evaluator. This makes a cached
+    toolbox safe to share between concurrent optimizations.
     
-    # Helper function to generate a random allocation
-    def generate_allocation():
-        # For each task, assign a random user
-        return [random.randint(0, len(users) - 1) for _ in range(len(tasks))]
+    Args:
+        population_size: Default number of individuals from toolbox.population
+        indpb: Probability of mutating each gene
+        tournsize: Tournament size for selection
     
-    # Register the generation function
-    toolbox.register("individual", tools.initIterate, creator.Individual, generate_allocation)
-    toolbox.register("population", tools.initRepeat, list, toolbox.individual)
+    Returns:
+        Configured toolbox
+    """
+    key = (population_size, indpb, tournsize)
+    toolbox = _toolbox_cache.get(key)
+    if toolbox is not None:
+        return toolbox
     
-    # Define the evaluation function for our task allocation problem
-    def evaluate_allocation(individual):
-        # Initialize cost
-        total_cost = 0
-        
-        # Track workload per user for balancing
-        user_workloads = {user['id']: 0 for user in users}
-        
-        # For each task and its assigned user index
-        for i, user_idx in enumerate(individual):
-            task = tasks[i]
-            user = users[user_idx]
-            user_id = user['id']
-            
-            # Increase user's workload
-            user_workloads[user_id] += 1
-            
-            # Factor 1: Priority cost - higher priority tasks should be prioritized
-            priority_map = {
-                'low': 1,
-                'medium': 2,
-                'high': 3,
-                'critical': 4
-            }
-            priority_cost = 5 - priority_map.get(task['priority'], 1)  # Inverse of priority
+    with _toolbox_lock:
+        if key not in _toolbox_cache:
+            toolbox = base.Toolbox()
             
-            # Factor 2: Due date cost - sooner due dates should be prioritized
-            now = datetime.now()
-            due_date = task['due_date']
-            days_left = max(0, (due_date - now).days)
-            due_date_cost = min(days_left, 10)  # Cap at 10 days
+            # Register the generation function
+            toolbox.register("population", _random_population, n=population_size)
             
-            # Factor 3: User skill match cost (would need skill data)
-            # For simplicity, we'll use a random value between 0-5
-            skill_match_cost = random.randint(0, 5)
+            # Register genetic operators
+            toolbox.register("clone", _clone_individual)
+            toolbox.register("mate", tools.cxTwoPoint)
+            toolbox.register("mutate", tools.mutUniformInt, low=0, indpb=indpb)
+            toolbox.register("select", tools.selTournament, tournsize=tournsize)
             
-            # Combine costs with weights
-            task_cost = (priority_cost * 3) + (due_date_cost * 2) + (skill_match_cost * 1)
-            total_cost += task_cost
+            _toolbox_cache[key] = toolbox
+        return _toolbox_cache[key]
+
+def make_evaluator(task_costs: np.ndarray, num_users: int,
+                   skill_costs: Optional[np.ndarray] = None) -> Callable[[List], None]:
+    """
+    Build the batch fitness function for one allocation problem.
+    
+    The returned function assigns fitness to a list of individuals in one
+    vectorized pass, skipping individuals whose cost is already memoized.
+    Its memo is available as the "memo" attribute.
+    
+    Args:
+        task_costs: Per-task costs from compute_task_costs
+        num_users: Number of users tasks can be assigned to
+        skill_costs: Optional (tasks x users) matrix from compute_skill_costs
+    
+    Returns:
+        Function that evaluates a list of individuals in place
+    """
+    memo = FitnessMemo()
+    
+    def evaluate_individuals(individuals):
+        """Assign fitness to individuals in a single vectorized batch"""
+        if not individuals:
+            return
+        genes = np.array(individuals, dtype=np.int64)
+        keys = [hash(row.tobytes()) for row in genes]
         
-        # Factor 4: Workload balance penalty
-        if len(users) > 1:
-            workload_values = list(user_workloads.values())
-            workload_std = np.std(workload_values)
-            workload_penalty = workload_std * 10  # Penalize uneven distribution
-            total_cost += workload_penalty
+        pending = []
+        for idx, (ind, key) in enumerate(zip(individuals, keys)):
+            cost = memo.get(key)
+            if cost is None:
+                pending.append(idx)
+            else:
+                ind.fitness.values = (cost,)
         
-        return (total_cost,)
+        if pending:
+            costs = evaluate_population(genes[pending], task_costs, num_users, skill_costs)
+            for idx, cost in zip(pending, costs):
+                individuals[idx].fitness.values = (float(cost),)
+                memo.put(keys[idx], float(cost))
     
-    # Register evaluation function
-    toolbox.register("evaluate", evaluate_allocation)
+    evaluate_individuals.memo = memo
+    return evaluate_individuals
+
+def run_generations(toolbox: base.Toolbox, population: List, ngen: int,
+                    evaluate: Callable[[List], None], num_users: int,
+                    cxpb: float = 0.5, mutpb: float = 0.2,
+                    progress: Optional[Callable[[int, int, float], None]] = None,
+                    tracker: Optional[StoppingTracker] = None,
+                    halloffame: Optional[tools.HallOfFame] = None) -> List:
+    """
+    Evolve a population in place for up to ngen generations.
     
-    # Register genetic operators
-    toolbox.register("mate", tools.cxTwoPoint)
-    toolbox.register("mutate", tools.mutUniformInt, low=0, up=len(users)-1, indpb=0.2)
-    toolbox.register("select", tools.selTournament, tournsize=3)
+    Same generational scheme as algorithms.eaSimple (with the variation
+    step of algorithms.varAnd), but with batch evaluation and the problem
+    size passed explicitly to the shared toolbox.
     
-    # Run the genetic algorithm
-    population = toolbox.population(n=50)
-    ngen = 40  # Number of generations
+    Args:
+        tracker: Optional stopping tracker that can end the run early
+        halloffame: Optional hall of fame that keeps the best individuals seen
+    
+    Returns:
+        The evolved population
+    """
+    evaluate([ind for ind in population if not ind.fitness.valid])
+    if halloffame is not None:
+        halloffame.update(population)
+    
+    for generation in range(1, ngen + 1):
+        offspring = [toolbox.clone(ind) for ind in toolbox.select(population, len(population))]
+        
+        # Apply crossover and mutation on the offspring
+        for i in range(1, len(offspring), 2):
+            if random.random() < cxpb:
+                offspring[i - 1], offspring[i] = toolbox.mate(offspring[i - 1], offspring[i])
+                del offspring[i - 1].fitness.values, offspring[i].fitness.values
+        for i in range(len(offspring)):
+            if random.random() < mutpb:
+                offspring[i], = toolbox.mutate(offspring[i], up=num_users - 1)
+                del offspring[i].fitness.values
+        
+        evaluate([ind for ind in offspring if not ind.fitness.valid])
+        population[:] = offspring
+        if halloffame is not None:
+            halloffame.update(population)
+        
+        best_cost = min(ind.fitness.values[0] for ind in population)
+        if progress:
+            progress(generation, ngen, best_cost)
+        if tracker is not None and tracker.update(generation, best_cost):
+            break
+    
+    return population
+
+def evolve_allocation(task_costs: np.ndarray, num_users: int,
+                      skill_costs: Optional[np.ndarray] = None,
+                      progress: Optional[Callable[[int, int, float], None]] = None,
+                      stopping: Optional[StoppingPolicy] = None) -> List[int]:
+    """
+    Run the genetic algorithm on precomputed task costs.
+    
+    Works purely on arrays so it can run in a worker process without the
+    original task and user documents.
+    
+    Args:
+        task_costs: Per-task costs from compute_task_costs
+        num_users: Number of users tasks can be assigned to
+        skill_costs: Optional (tasks x users) matrix from compute_skill_costs
+        progress: Optional callback called as progress(generation, ngen, best_cost)
+        stopping: When to stop (defaults to a fixed 40 generations)
     
-    algorithms.eaSimple(population, toolbox, cxpb=0.5, mutpb=0.2, ngen=ngen, verbose=False)
+    Returns:
+        List with the index of the assigned user for each task - the best
+        allocation seen, even if the run was stopped early
+    """
+    if len(task_costs) == 0 or num_users == 0:
+        return []
+    
+    if stopping is None:
+        stopping = StoppingPolicy(max_generations=40)
+    
+    toolbox = get_toolbox()
+    evaluate = make_evaluator(task_costs, num_users, skill_costs)
+    halloffame = tools.HallOfFame(1)
+    
+    # Run the genetic algorithm
+    population = toolbox.population(len(task_costs), num_users)
+    run_generations(
+        toolbox, population, stopping.max_generations, evaluate, num_users,
+        progress=progress, tracker=stopping.start(minimize=True), halloffame=halloffame
+    )
     
     # Get the best individual
-    best_individual = tools.selBest(population, k=1)[0]
+    return list(halloffame[0])
+
+# Available allocation solvers - all take (task_costs, num_users, skill_costs) and return one user index per task
+SOLVERS = {
+    'ga': evolve_allocation,
+    'min_cost_flow': solve_min_cost_flow,
+    'greedy': solve_greedy
+}
+
+def optimize_task_allocation(tasks: List[Dict], users: List[Dict], solver: str = 'ga',
+                             stopping: Optional[StoppingPolicy] = None) -> List[Tuple[str, str]]:
+    """
+    Optimize task allocation to users.
+    
+    Args:
+        tasks: List of task dictionaries with id, priority, due_date, etc.
+        users: List of user dictionaries with id, name, etc.
+        solver: One of SOLVERS - the DEAP genetic algorithm ("ga"), the exact
+            capacity-constrained assignment ("min_cost_flow") or greedy with
+            local search ("greedy")
+        stopping: When to stop the genetic algorithm (only used by the "ga" solver)
+    
+    Returns:
+        List of (task_id, user_id) tuples representing the optimal allocation
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver: {solver}")
+    if not tasks or not users:
+        return []
+    
+    # Costs that don't depend on the allocation are computed once per run
+    options = {'stopping': stopping} if solver == 'ga' else {}
+    best_individual = SOLVERS[solver](
+        compute_task_costs(tasks), len(users), skill_costs=compute_skill_costs(tasks, users), **options
+    )
     
     # Convert the best individual to task-user assignments
     assignments = []
@@ -139,7 +418,10 @@ def get_task_status(task):
 
 def sort_tasks_for_user(tasks, user_id=None):
     """
-    Sort tasks for a specific user based on priority and due date.
+    Sort tasks for a specific user based on status, priority and due date.
+    
+    Uses the same order as the stored sort_rank; the statuses are taken as
+    stored (overdue tasks are marked missed by the status sweeper).
     
     Args:
         tasks: List of task dictionaries
@@ -152,33 +434,5 @@ def sort_tasks_for_user(tasks, user_id=None):
     if user_id:
         tasks = [t for t in tasks if t.get('assigned_to') == user_id]
     
-    # Update task statuses based on current date/time
-    for task in tasks:
-        task['status'] = get_task_status(task)
-    
-    # Define priority order
-    priority_order = {
-        'critical': 0,
-        'high': 1,
-        'medium': 2,
-        'low': 3
-    }
-    
-    # Sort tasks by status (overdue first), then priority, then due date
-    status_order = {
-        'overdue': 0,
-        'in_progress': 1, 
-        'todo': 2,
-        'complete': 3
-    }
-    
-    sorted_tasks = sorted(
-        tasks,
-        key=lambda t: (
-            status_order.get(t['status'], 999),
-            priority_order.get(t['priority'], 999),
-            t['due_date']
-        )
-    )
-    
-    return sorted_tasks 
\ No newline at end of file
+    # Sort tasks by status (missed first), then priority, then due date
+    return sorted(tasks, key=lambda t: (sort_rank(t), t['due_date']))
@@ -0,0 +1,77 @@
+from typing import Dict, List
+
+# Stored work queue order of tasks. sort_rank combines the status and the
+# priority of a task into one number (lower comes first) that is kept up to
+# date on every write, so a user's queue is read straight from the
+# (assigned_to, sort_rank, due_date) index in the order it's shown.
+
+# Both the model's and the legacy status names are ranked
+STATUS_RANKS = {
+    "overdue": 0,
+    "missed": 0,
+    "in_progress": 1,
+    "todo": 2,
+    "pending": 2,
+    "complete": 3,
+    "completed": 3,
+}
+
+PRIORITY_RANKS = {
+    "critical": 0,
+    "high": 1,
+    "medium": 2,
+    "low": 3,
+}
+
+# Unknown or missing values sort last
+UNKNOWN_RANK = 4
+
+# Order of a user's queue: status, then priority (both in sort_rank), then due date
+QUEUE_SORT = [("sort_rank", 1), ("due_date", 1), ("_id", 1)]
+
+def sort_rank(task: Dict) -> int:
+    """Queue rank of a task: status rank first, then priority rank"""
+    status_rank = STATUS_RANKS.get(task.get("status"), UNKNOWN_RANK)
+    priority_rank = PRIORITY_RANKS.get(task.get("priority"), UNKNOWN_RANK)
+    return status_rank * (UNKNOWN_RANK + 1) + priority_rank
+
+def _rank_switch(field: str, ranks: Dict[str, int]) -> Dict:
+    return {"$switch": {
+        "branches": [{"case": {"$eq": [f"${field}", value]}, "then": rank} for value, rank in ranks.items()],
+        "default": UNKNOWN_RANK
+    }}
+
+# Aggregation expression computing sort_rank in the database, the same way as sort_rank()
+SORT_RANK_EXPRESSION = {"$add": [
+    {"$multiply": [_rank_switch("status", STATUS_RANKS), UNKNOWN_RANK + 1]},
+    _rank_switch("priority", PRIORITY_RANKS)
+]}
+
+def ranked_update(update_data: Dict) -> List[Dict]:
+    """
+    Update pipeline setting fields of a task and recomputing its sort_rank.
+
+    The rank is computed from the stored document, so it's right whether the
+    update changes the status, the priority or both.
+
+    Args:
+        update_data: Fields to set
+
+    Returns:
+        Pipeline for update_one / find_one_and_update
+    """
+    return [
+        # $literal keeps values starting with "$" from being read as field paths
+        {"$set": {field: {"$literal": value} for field, value in update_data.items()}},
+        {"$set": {"sort_rank": SORT_RANK_EXPRESSION}}
+    ]
+
+async def backfill_sort_rank(collection) -> int:
+    """
+    Set sort_rank on all tasks with one server side update.
+
+    Returns:
+        Number of tasks whose rank changed
+    """
+    result = await collection.update_many({}, [{"$set": {"sort_rank": SORT_RANK_EXPRESSION}}])
+    return result.modified_count
@@ -0,0 +1,70 @@
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.utils.task_optimization import SOLVERS, compute_skill_costs, compute_task_costs, evaluate_population
+
+# Compare cost and runtime of the task allocation solvers on synthetic data
+
+SKILLS = ["hvac", "electrical", "plumbing", "elevator", "security", "cleaning"]
+
+def generate_tasks(num_tasks, seed):
+    """Generate random tasks with a priority, due date and tags"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    return [
+        {
+            "id": str(i),
+            "priority": rng.choice(["low", "medium", "high", "critical"]),
+            "due_date": now + timedelta(days=rng.randint(-5, 30), hours=rng.randint(0, 23)),
+            "tags": rng.sample(SKILLS, rng.randint(0, 2)),
+        }
+        for i in range(num_tasks)
+    ]
+
+def generate_users(num_users, seed):
+    """Generate users with a random set of skills"""
+    rng = random.Random(seed)
+    return [{"id": f"user{i}", "skills": rng.sample(SKILLS, rng.randint(1, 3))} for i in range(num_users)]
+
+def allocation_cost(allocation, task_costs, num_users, skill_costs):
+    """Cost of an allocation under the GA objective"""
+    return float(evaluate_population(np.array([allocation]), task_costs, num_users, skill_costs)[0])
+
+def run_benchmark(num_tasks, num_users, repeats, seed):
+    tasks = generate_tasks(num_tasks, seed)
+    task_costs = compute_task_costs(tasks)
+    skill_costs = compute_skill_costs(tasks, generate_users(num_users, seed))
+
+    print(f"\n=== {num_tasks} tasks, {num_users} users ===")
+    print(f"{'solver':<15}{'cost':>12}{'runtime (ms)':>15}{'workload std':>15}")
+
+    for name, solver in SOLVERS.items():
+        runtimes = []
+        for repeat in range(repeats):
+            random.seed(seed + repeat)
+            np.random.seed(seed + repeat)
+            start = time.perf_counter()
+            allocation = solver(task_costs, num_users, skill_costs=skill_costs)
+            runtimes.append((time.perf_counter() - start) * 1000)
+
+        workload_std = np.bincount(allocation, minlength=num_users).std()
+        cost = allocation_cost(allocation, task_costs, num_users, skill_costs)
+        print(f"{name:<15}{cost:>12.1f}{np.median(runtimes):>15.1f}{workload_std:>15.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark task allocation solvers")
+    parser.add_argument("--tasks", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--users", type=int, default=30)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for num_tasks in args.tasks:
+        run_benchmark(num_tasks, args.users, args.repeats, args.seed)
+
+if __name__ == "__main__":
+    main()
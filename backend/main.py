@@ -5,6 +5,8 @@ import uvicorn
 from app.routers import auth, users, tasks, analytics, predictions
 from app.routers import tasks_fix
 from app.config.database import init_db
+from app.utils.optimizer_service import optimizer_service
+from app.utils.status_sweeper import status_sweeper
 
 app = FastAPI(title="FMS - Facility Management System API")
 
@@ -37,6 +39,12 @@ async def options_route(request: Request, full_path: str):
 @app.on_event("startup")
 async def startup():
     await init_db()
+    status_sweeper.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await status_sweeper.stop()
+    optimizer_service.shutdown()
 
 @app.get("/")
 async def root():
@@ -0,0 +1,33 @@
+import argparse
+import asyncio
+
+from app.config.database import tasks_collection
+from app.utils.daily_stats import backfill_daily_stats
+from app.utils.task_ranking import backfill_sort_rank
+
+# Maintenance commands for the FMS database
+
+async def run_backfill_daily_stats(args):
+    processed = await backfill_daily_stats(batch_size=args.batch_size)
+    print(f"Rebuilt daily task stats from {processed} tasks")
+
+async def run_backfill_sort_rank(args):
+    updated = await backfill_sort_rank(tasks_collection)
+    print(f"Set the sort rank of {updated} tasks")
+
+def main():
+    parser = argparse.ArgumentParser(description="FMS database maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backfill = commands.add_parser("backfill-daily-stats", help="Rebuild the daily_task_stats and user_task_stats rollups from all tasks (stop the API first)")
+    backfill.add_argument("--batch-size", type=int, default=1000)
+    backfill.set_defaults(handler=run_backfill_daily_stats)
+
+    sort_rank = commands.add_parser("backfill-sort-rank", help="Set the stored queue rank of all tasks")
+    sort_rank.set_defaults(handler=run_backfill_sort_rank)
+
+    args = parser.parse_args()
+    asyncio.run(args.handler(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.config.database import DATABASE_NAME, INDEXES, MONGODB_URL
+from app.routers.analytics import _dashboard_pipeline, _in_date_range
+from app.routers.tasks import ACTIVE_USERS_QUERY, UNASSIGNED_QUERY, _creator_filter, _task_list_query, _version_filter
+from app.routers.tasks_fix import ACTIVITY_SORT, _task_stats_query
+from app.utils.bulk_writes import assignment_filter
+from app.utils.change_feed import changed_since_query, deleted_since_query
+from app.utils.daily_stats import daily_totals_pipeline
+from app.utils.pagination import PAGE_SORT, after_cursor, encode_cursor
+from app.utils.performance_metrics import OVERDUE_STATUSES, USER_ROLLUP_METRICS_PIPELINE
+from app.utils.status_sweeper import overdue_query
+from app.utils.task_ranking import QUEUE_SORT
+
+# Runs explain() on the queries the routers and maintenance jobs send, built
+# with the same helpers, and fails if any of them scans a whole collection,
+# or sorts in memory for the sorted lists, unless the scan is in
+# ALLOWED_COLLSCANS. Skipped when no mongod is reachable - point
+# MONGODB_URL / DATABASE_NAME at a local one.
+
+SERVER_TIMEOUT_MS = 1000
+
+now = datetime.utcnow()
+start_date = now - timedelta(days=30)
+user_id = "000000000000000000000000"
+object_id = ObjectId(user_id)
+cursor = encode_cursor({"_id": object_id, "due_date": now})
+queue_cursor = encode_cursor({"_id": object_id, "sort_rank": 7, "due_date": now}, QUEUE_SORT)
+
+def _count_pipeline(query, limit=None):
+    """Pipeline count_documents() sends for a query"""
+    return [{"$match": query}] + ([{"$limit": limit}] if limit else []) + [{"$group": {"_id": 1, "n": {"$sum": 1}}}]
+
+# (name, collection, filter) of the find queries
+FIND_QUERIES = [
+    # Users
+    ("user by email", "users", {"email": "test@example.com"}),
+    ("user by id", "users", {"_id": object_id}),
+    ("users by ids", "users", {"_id": {"$in": [object_id]}}),
+    ("active users", "users", ACTIVE_USERS_QUERY),
+    ("changed users", "users", changed_since_query(start_date)),
+    ("all users", "users", {}),
+    # Single tasks and conditional task writes
+    ("task by id", "tasks", {"_id": object_id}),
+    ("tasks by ids", "tasks", {"_id": {"$in": [object_id]}}),
+    ("task of its creator", "tasks", _creator_filter(user_id, user_id)),
+    ("batch write of a task version", "tasks", _version_filter({"_id": object_id, "updated_at": now, "status": "pending"})),
+    ("allocation write", "tasks", assignment_filter(user_id, None)),
+    ("missed status flip", "tasks", {"_id": object_id, **overdue_query(now)}),
+    ("overdue open tasks", "tasks", overdue_query(now)),
+    # Task statistics and optimizer runs
+    ("task stats of a user", "tasks", _task_stats_query(user_id)),
+    ("task stats of all tasks", "tasks", _task_stats_query("all")),
+    ("optimize all tasks", "tasks", {}),
+    # Analytics, exports and change feeds
+    ("analytics date range", "tasks", _in_date_range(start_date)),
+    ("changed tasks", "tasks", changed_since_query(start_date)),
+    ("deleted tasks", "tombstones", deleted_since_query("tasks", start_date)),
+    # Maintenance jobs
+    ("daily stats backfill", "tasks", {}),
+    ("sort rank backfill", "tasks", {}),
+]
+
+# (name, collection, filter, sort) of the sorted lists, read 100 at a time
+PAGE_QUERIES = [
+    ("first page of tasks", "tasks", _task_list_query(), PAGE_SORT),
+    ("next page of tasks", "tasks", after_cursor(_task_list_query(), cursor), PAGE_SORT),
+    ("page of a user's tasks", "tasks", after_cursor(_task_list_query(assigned_to=user_id), cursor), PAGE_SORT),
+    ("page of tasks by priority", "tasks", _task_list_query(priority="high"), PAGE_SORT),
+    ("page of tasks due before", "tasks", _task_list_query(due_before=now), PAGE_SORT),
+    ("first page of a user's queue", "tasks", _task_list_query(assigned_to=user_id), QUEUE_SORT),
+    ("next page of a user's queue", "tasks", after_cursor(_task_list_query(assigned_to=user_id), queue_cursor, QUEUE_SORT), QUEUE_SORT),
+    ("allocation problem tasks", "tasks", UNASSIGNED_QUERY, PAGE_SORT),
+    ("recent activities", "activities", {}, ACTIVITY_SORT),
+]
+
+# (name, collection, pipeline) of the aggregations
+AGGREGATIONS = [
+    ("analytics dashboard", "tasks", _dashboard_pipeline(start_date)),
+    ("user performance", "user_task_stats", USER_ROLLUP_METRICS_PIPELINE),
+    ("daily totals", "daily_task_stats", daily_totals_pipeline(start_date, now)),
+    ("daily overdue totals", "daily_task_stats", daily_totals_pipeline(start_date, now, OVERDUE_STATUSES)),
+    ("total of all tasks", "tasks", _count_pipeline(_task_list_query())),
+    ("total of a user's tasks", "tasks", _count_pipeline(_task_list_query(assigned_to=user_id))),
+    ("task exists", "tasks", _count_pipeline({"_id": object_id}, limit=1)),
+]
+
+# Queries that read a whole collection on purpose, with the reason
+ALLOWED_COLLSCANS = {
+    "all users": "user lists and the user name joins read every user; the collection is small",
+    "task stats of all tasks": "/task-stats/all summarizes at most 100 tasks",
+    "optimize all tasks": "/optimize-tasks re-allocates at most 100 tasks",
+    "daily stats backfill": "maintenance job rebuilding the rollups from every task",
+    "sort rank backfill": "maintenance job recomputing sort_rank on every task",
+    "user performance": "the per-user rollup has one row per user and status, however many tasks there are",
+    "total of all tasks": "opt-in X-Total-Count of the unfiltered task list",
+}
+
+def _run(operation):
+    """Run an async operation on the configured database with a client of the current event loop"""
+    async def main():
+        client = AsyncIOMotorClient(MONGODB_URL, serverSelectionTimeoutMS=SERVER_TIMEOUT_MS)
+        try:
+            return await operation(client[DATABASE_NAME])
+        finally:
+            client.close()
+    return asyncio.run(main())
+
+@pytest.fixture(scope="module")
+def indexes():
+    """Create the index registry, skipping the module without a mongod"""
+    async def create(db):
+        await db.command("ping")
+        for collection_name, collection_indexes in INDEXES.items():
+            for keys, options in collection_indexes:
+                await db[collection_name].create_index(keys, **options)
+    try:
+        _run(create)
+    except Exception as e:
+        pytest.skip(f"No MongoDB reachable at {MONGODB_URL}: {e}")
+
+def find_stages(plan, stage="COLLSCAN"):
+    """Yield the stages of a kind in the winning plans of an explain output"""
+    if isinstance(plan, dict):
+        for key, value in plan.items():
+            if key == "winningPlan":
+                yield from _stages(value, stage)
+            elif key != "rejectedPlans":
+                yield from find_stages(value, stage)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from find_stages(item, stage)
+
+def _stages(plan, stage):
+    if isinstance(plan, dict):
+        if plan.get("stage") == stage:
+            yield plan
+        for value in plan.values():
+            yield from _stages(value, stage)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _stages(item, stage)
+
+def assert_uses_index(name, plan, stages=("COLLSCAN",)):
+    found = [stage for stage in stages if any(find_stages(plan, stage))]
+    if found == ["COLLSCAN"] and name in ALLOWED_COLLSCANS:
+        return
+    assert not found, f"{name} isn't served by an index: {', '.join(found)}"
+
+def _names(queries):
+    return [query[0] for query in queries]
+
+@pytest.mark.parametrize("name, collection, query", FIND_QUERIES, ids=_names(FIND_QUERIES))
+@pytest.mark.usefixtures("indexes")
+def test_find_uses_index(name, collection, query):
+    plan = _run(lambda db: db[collection].find(query).explain())
+    assert_uses_index(name, plan)
+
+@pytest.mark.parametrize("name, collection, query, sort", PAGE_QUERIES, ids=_names(PAGE_QUERIES))
+@pytest.mark.usefixtures("indexes")
+def test_sorted_list_uses_index(name, collection, query, sort):
+    plan = _run(lambda db: db[collection].find(query).sort(sort).limit(100).explain())
+    assert_uses_index(name, plan, ("COLLSCAN", "SORT"))
+
+@pytest.mark.parametrize("name, collection, pipeline", AGGREGATIONS, ids=_names(AGGREGATIONS))
+@pytest.mark.usefixtures("indexes")
+def test_aggregation_uses_index(name, collection, pipeline):
+    plan = _run(lambda db: db.command("aggregate", collection, pipeline=pipeline, explain=True))
+    assert_uses_index(name, plan)
+
+def test_allowed_scans_are_checked():
+    """Every allow-listed scan must still be one of the checked queries"""
+    checked = set(_names(FIND_QUERIES) + _names(PAGE_QUERIES) + _names(AGGREGATIONS))
+    assert set(ALLOWED_COLLSCANS) <= checked